@@ -4,7 +4,10 @@ from django.templatetags.static import static
 from django.utils.html import format_html
 from django.utils.http import url_has_allowed_host_and_scheme
 
-from .models import Order, OrderItem, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from place.crud_helpers import enqueue_addresses
+
+from .models import Banner, Order, OrderItem, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .thumbnails import get_srcset, get_thumbnail_url
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -28,6 +31,11 @@ class RestaurantAdmin(admin.ModelAdmin):
         RestaurantMenuItemInline
     ]
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.address:
+            enqueue_addresses([obj.address])
+
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -95,7 +103,18 @@ class ProductAdmin(admin.ModelAdmin):
         if not obj.image or not obj.id:
             return 'нет картинки'
         edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
-        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=obj.image.url)
+        if not obj.thumbnails_ready:
+            return format_html(
+                '<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>',
+                edit_url=edit_url,
+                src=obj.image.url,
+            )
+        return format_html(
+            '<a href="{edit_url}"><img src="{src}" srcset="{srcset}" sizes="100px" style="max-height: 50px;"/></a>',
+            edit_url=edit_url,
+            src=get_thumbnail_url(obj.image, width=100),
+            srcset=get_srcset(obj.image),
+        )
     get_image_list_preview.short_description = 'превью'
 
 
@@ -111,6 +130,12 @@ class OrderItemsInline(admin.TabularInline):
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemsInline]
+    list_display = ['id', '__str__', 'status', 'total_price', 'items_count', 'registered_at']
+    readonly_fields = ['total_price', 'items_count']
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        Order.objects.filter(pk=form.instance.pk).recalculate_totals()
 
     def response_post_save_change(self, request, obj):
         res = super().response_post_save_change(request, obj)
@@ -119,3 +144,44 @@ class OrderAdmin(admin.ModelAdmin):
             return redirect(next)
         else:
             return res
+
+
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'ordering',
+        'active_from',
+        'active_until',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'ordering',
+    ]
+    readonly_fields = [
+        'get_image_preview',
+    ]
+    fields = [
+        'title',
+        'text',
+        'image',
+        'get_image_preview',
+        'ordering',
+        'active_from',
+        'active_until',
+    ]
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return 'выберите картинку'
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+    get_image_preview.short_description = 'превью'
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html('<img src="{src}" style="max-height: 50px;"/>', src=obj.image.url)
+    get_image_list_preview.short_description = 'превью'
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .content_versions import BANNERS, get_content_version
+from .models import Banner
+
+
+def get_banners():
+    """Return all banners with image URLs resolved, read from the database once per banners version."""
+    cache_key = f'foodcartapp:banners:{get_content_version(BANNERS).token}'
+    banners = cache.get(cache_key)
+    if banners is None:
+        banners = [
+            {
+                'id': banner.id,
+                'title': banner.title,
+                'src': banner.image.url,
+                'text': banner.text,
+                'active_from': banner.active_from,
+                'active_until': banner.active_until,
+            }
+            for banner in Banner.objects.all()
+        ]
+        cache.set(cache_key, banners, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+    return banners
+
+
+def get_active_banners(now=None):
+    now = now or timezone.now()
+    return [
+        banner for banner in get_banners()
+        if (banner['active_from'] is None or banner['active_from'] <= now)
+        and (banner['active_until'] is None or now < banner['active_until'])
+    ]
+
+
+def serialize_banners(banners):
+    return [
+        {
+            'title': banner['title'],
+            'src': banner['src'],
+            'text': banner['text'],
+        }
+        for banner in banners
+    ]
+
+
+def get_banners_etag(request):
+    # banners appear and disappear on schedule without any edits, so active ones are a part of etag
+    active_banners_ids = '.'.join(str(banner['id']) for banner in get_active_banners())
+    return f'{get_content_version(BANNERS).token}-{active_banners_ids}'
+
+
+def get_banners_last_modified(request):
+    now = timezone.now()
+    passed_boundaries = [
+        moment
+        for banner in get_banners()
+        for moment in (banner['active_from'], banner['active_until'])
+        if moment and moment <= now
+    ]
+    return max([get_content_version(BANNERS).modified_at, *passed_boundaries])
@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .content_versions import CATALOGUE, get_content_version
+from .json_encoding import dump_json
+from .matching import build_product_restaurants_index
+from .models import Product, Restaurant, RestaurantMenuItem
+from .thumbnails import get_srcset, get_thumbnail_url
+
+
+def get_catalogue_cache_key(name):
+    return f'foodcartapp:{name}:{get_content_version(CATALOGUE).token}'
+
+
+def get_availability():
+    """Return where products are available, built from the menu once per catalogue version.
+
+    Result is a dict with keys:
+    - `restaurants`: restaurant id -> {'id', 'name'},
+    - `product_restaurants`: product id -> frozenset of restaurant ids,
+    - `restaurant_products`: restaurant id -> frozenset of product ids.
+    """
+    cache_key = get_catalogue_cache_key('availability')
+    availability = cache.get(cache_key)
+    if availability is None:
+        menu_items = RestaurantMenuItem.objects.filter(availability=True).values_list('product', 'restaurant')
+        product_restaurants = build_product_restaurants_index(menu_items)
+
+        restaurant_products = defaultdict(set)
+        for product_id, restaurant_ids in product_restaurants.items():
+            for restaurant_id in restaurant_ids:
+                restaurant_products[restaurant_id].add(product_id)
+
+        availability = {
+            'restaurants': {
+                restaurant_id: {'id': restaurant_id, 'name': name}
+                for restaurant_id, name in Restaurant.objects.values_list('id', 'name')
+            },
+            'product_restaurants': product_restaurants,
+            'restaurant_products': {
+                restaurant_id: frozenset(product_ids)
+                for restaurant_id, product_ids in restaurant_products.items()
+            },
+        }
+        cache.set(cache_key, availability, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+    return availability
+
+
+def get_dumped_products():
+    """Return available products as dicts ready for JSON, built once per catalogue version."""
+    cache_key = get_catalogue_cache_key('dumped_products')
+    dumped_products = cache.get(cache_key)
+    if dumped_products is None:
+        products = Product.objects.select_related('category').available().order_by('id')
+        dumped_products = serialize_products(products)
+        cache.set(cache_key, dumped_products, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+    return dumped_products
+
+
+def get_serialized_products(pretty=False):
+    """Return JSON bytes of available products, rendered once per catalogue version."""
+    layout = 'pretty' if pretty else 'compact'
+    cache_key = get_catalogue_cache_key(f'products:{layout}')
+    body = cache.get(cache_key)
+    if body is None:
+        body = dump_json(get_dumped_products(), pretty=pretty)
+        cache.set(cache_key, body, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+    return body
+
+
+def get_serialized_restaurant_menu(restaurant_id, pretty=False):
+    """Return JSON bytes of products available in the restaurant or None for unknown restaurant."""
+    layout = 'pretty' if pretty else 'compact'
+    cache_key = get_catalogue_cache_key(f'menu:{restaurant_id}:{layout}')
+    body = cache.get(cache_key)
+    if body is None:
+        availability = get_availability()
+        restaurant = availability['restaurants'].get(restaurant_id)
+        if not restaurant:
+            return None
+        product_ids = availability['restaurant_products'].get(restaurant_id, frozenset())
+        menu = {
+            'restaurant': restaurant,
+            'products': [product for product in get_dumped_products() if product['id'] in product_ids],
+        }
+        body = dump_json(menu, pretty=pretty)
+        cache.set(cache_key, body, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+    return body
+
+
+def serialize_products(products, availability=None):
+    availability = availability or get_availability()
+    restaurants = availability['restaurants']
+    product_restaurants = availability['product_restaurants']
+
+    dumped_products = []
+    for product in products:
+        dumped_product = {
+            'id': product.id,
+            'name': product.name,
+            'price': product.price,
+            'special_status': product.special_status,
+            'description': product.description,
+            'category': {
+                'id': product.category.id,
+                'name': product.category.name,
+            } if product.category else None,
+            'image': product.image.url,
+            'image_thumb': get_thumbnail_url(product.image) if product.thumbnails_ready else product.image.url,
+            'image_srcset': get_srcset(product.image) if product.thumbnails_ready else None,
+            'restaurants': [
+                restaurants[restaurant_id]
+                for restaurant_id in sorted(product_restaurants.get(product.id, ()))
+            ],
+        }
+        dumped_products.append(dumped_product)
+    return dumped_products
@@ -0,0 +1,40 @@
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+
+CATALOGUE = 'catalogue'
+BANNERS = 'banners'
+
+ContentVersion = namedtuple('ContentVersion', ['token', 'modified_at'])
+
+
+def get_content_version(content_name):
+    """Return version of public content, which changes every time the content is edited.
+
+    Version lives in the cache, so reading it does not touch the database. When the
+    cache loses it, a new version is started and clients download content once again.
+    """
+    cache_key = f'foodcartapp:{content_name}_version'
+    version = cache.get(cache_key)
+    if version is None:
+        new_version = ContentVersion(token=uuid.uuid4().hex, modified_at=timezone.now())
+        cache.add(cache_key, new_version, timeout=None)
+        version = cache.get(cache_key) or new_version
+    return version
+
+
+def bump_content_version(content_name):
+    new_version = ContentVersion(token=uuid.uuid4().hex, modified_at=timezone.now())
+    cache.set(f'foodcartapp:{content_name}_version', new_version, timeout=None)
+
+
+def content_version_condition(content_name):
+    """Decorate view to answer 304 Not Modified by content version, without running the view."""
+    return condition(
+        etag_func=lambda request, *args, **kwargs: get_content_version(content_name).token,
+        last_modified_func=lambda request, *args, **kwargs: get_content_version(content_name).modified_at,
+    )
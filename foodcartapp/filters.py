@@ -0,0 +1,74 @@
+import base64
+import binascii
+
+import django_filters
+from django import forms
+
+from .models import Product
+
+
+PRODUCT_FIELDS = [
+    'id',
+    'name',
+    'price',
+    'special_status',
+    'description',
+    'category',
+    'image',
+    'image_thumb',
+    'image_srcset',
+    'restaurants',
+]
+
+
+class ProductFilter(django_filters.FilterSet):
+    category = django_filters.NumberFilter(field_name='category')
+    special = django_filters.BooleanFilter(field_name='special_status')
+
+    class Meta:
+        model = Product
+        fields = ['category', 'special']
+
+
+class ProductsPageForm(forms.Form):
+    limit = forms.IntegerField(min_value=1, max_value=100, required=False)
+    cursor = forms.CharField(required=False)
+    fields = forms.CharField(required=False)
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data['cursor']
+        if not cursor:
+            return None
+        try:
+            return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise forms.ValidationError('Некорректный курсор')
+
+    def clean_fields(self):
+        fields = [field for field in self.cleaned_data['fields'].split(',') if field]
+        unknown_fields = set(fields) - set(PRODUCT_FIELDS)
+        if unknown_fields:
+            raise forms.ValidationError(
+                f'Неизвестные поля: {", ".join(sorted(unknown_fields))}. '
+                f'Доступны: {", ".join(PRODUCT_FIELDS)}'
+            )
+        return fields
+
+
+def filter_dumped_products(dumped_products, filter_data, cursor=None):
+    """Filter cached dumped products by cleaned data of `ProductFilter` form, without queries.
+
+    Products are ordered by id, so the page after `cursor` holds products with greater ids.
+    """
+    category_id = filter_data['category']
+    special = filter_data['special']
+    return [
+        product for product in dumped_products
+        if (category_id is None or (product['category'] and product['category']['id'] == category_id))
+        and (special is None or product['special_status'] == special)
+        and (cursor is None or product['id'] > cursor)
+    ]
+
+
+def encode_cursor(product_id):
+    return base64.urlsafe_b64encode(str(product_id).encode()).decode()
@@ -0,0 +1,85 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_422_UNPROCESSABLE_ENTITY, is_success
+
+from .models import IdempotencyKey
+
+
+KEY_MAX_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def get_request_hash(data):
+    dumped_data = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(dumped_data.encode()).hexdigest()
+
+
+def get_expiration_border(now=None):
+    return (now or timezone.now()) - settings.IDEMPOTENCY_KEY_TTL
+
+
+def replay_response(stored_key, request_hash):
+    if stored_key.request_hash != request_hash:
+        return Response(
+            {'detail': 'Ключ Idempotency-Key уже использован для другого запроса'},
+            status=HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        stored_key.response_body,
+        status=stored_key.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def idempotent(view):
+    """Let clients retry a DRF view safely with `Idempotency-Key` header.
+
+    The first successful response is stored with hash of the request data.
+    Retries with the same key and data get it back without calling the view,
+    with other data they get 422. Failed responses aren't stored, so the
+    client may fix the request and retry with the same key. Keys live for
+    `IDEMPOTENCY_KEY_TTL`, see `delete_expired_idempotency_keys` command.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > KEY_MAX_LENGTH:
+            return Response(
+                {'detail': f'Idempotency-Key длиннее {KEY_MAX_LENGTH} символов'},
+                status=HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = get_request_hash(request.data)
+        stored_key = IdempotencyKey.objects.filter(key=key).first()
+        if stored_key and stored_key.created_at < get_expiration_border():
+            stored_key.delete()
+            stored_key = None
+        if stored_key:
+            return replay_response(stored_key, request_hash)
+
+        try:
+            with transaction.atomic():
+                response = view(request, *args, **kwargs)
+                if is_success(response.status_code):
+                    IdempotencyKey.objects.create(
+                        key=key,
+                        request_hash=request_hash,
+                        response_status=response.status_code,
+                        response_body=response.data,
+                    )
+        except IntegrityError:
+            # a concurrent request with the same key got saved first, ours is rolled back
+            stored_key = IdempotencyKey.objects.filter(key=key).first()
+            if not stored_key:
+                raise
+            return replay_response(stored_key, request_hash)
+        return response
+    return wrapper
@@ -0,0 +1,33 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dump_json(data, pretty=False, use_orjson=True):
+    """Return UTF-8 JSON bytes, compact unless `pretty` is asked for.
+
+    Encodes with orjson when it is installed and falls back to stdlib json.
+    Decimals and lazy strings are encoded by DjangoJSONEncoder rules in both cases.
+    """
+    if orjson and use_orjson:
+        return orjson.dumps(
+            data,
+            default=DjangoJSONEncoder().default,
+            option=orjson.OPT_INDENT_2 if pretty else 0,
+        )
+    return json.dumps(
+        data,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        indent=2 if pretty else None,
+        separators=None if pretty else (',', ':'),
+    ).encode()
+
+
+def wants_pretty_json(request):
+    return request.GET.get('pretty') in ('1', 'true')
@@ -0,0 +1,56 @@
+import json
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from foodcartapp.catalogue import serialize_products
+from foodcartapp.json_encoding import dump_json, orjson
+from foodcartapp.models import Product, ProductCategory
+
+
+class Command(BaseCommand):
+    help = 'Замеряет размер и время кодирования JSON меню на выдуманном каталоге, не трогая базу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000, help='Сколько товаров в каталоге')
+        parser.add_argument('--repeat', type=int, default=20, help='Сколько раз кодировать каталог')
+
+    def handle(self, *args, **options):
+        categories = [ProductCategory(id=i, name=f'Категория {i}') for i in range(1, 11)]
+        products = [
+            Product(
+                id=i,
+                name=f'Бургер №{i}',
+                category=categories[i % len(categories)],
+                price=Decimal('199.90') + i,
+                image=f'burger-{i}.jpg',
+                special_status=i % 7 == 0,
+                description='Сочная котлета из говядины, свежие овощи и фирменный соус',
+            )
+            for i in range(1, options['products'] + 1)
+        ]
+        availability = {
+            'restaurants': {i: {'id': i, 'name': f'Star Burger №{i}'} for i in range(1, 11)},
+            'product_restaurants': {product.id: frozenset(range(1, 1 + product.id % 10)) for product in products},
+        }
+        data = serialize_products(products, availability)
+
+        encoders = {
+            'json, indent=4 (old)': lambda: json.dumps(
+                data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4,
+            ).encode(),
+            'json, compact': lambda: dump_json(data, use_orjson=False),
+            'json, ?pretty=1': lambda: dump_json(data, pretty=True, use_orjson=False),
+        }
+        if orjson:
+            encoders['orjson, compact'] = lambda: dump_json(data)
+            encoders['orjson, ?pretty=1'] = lambda: dump_json(data, pretty=True)
+        else:
+            self.stdout.write('orjson не установлен, замеряю только json из стандартной библиотеки')
+
+        self.stdout.write(f'Товаров: {len(products)}, повторов: {options["repeat"]}')
+        for name, encode in encoders.items():
+            seconds = timeit.timeit(encode, number=options['repeat']) / options['repeat']
+            self.stdout.write(f'{name:<24} {len(encode()):>9} байт {seconds * 1000:>8.2f} мс')
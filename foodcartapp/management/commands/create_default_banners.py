@@ -0,0 +1,31 @@
+from django.contrib.staticfiles import finders
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Banner
+
+
+DEFAULT_BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Создаёт баннеры витрины из картинок в assets, если баннеров ещё нет'
+
+    def handle(self, *args, **options):
+        if Banner.objects.exists():
+            self.stdout.write('Баннеры уже есть')
+            return
+        for ordering, (title, image_name, text) in enumerate(DEFAULT_BANNERS):
+            image_path = finders.find(image_name)
+            if not image_path:
+                self.stderr.write(f'Картинка {image_name} не найдена')
+                continue
+            banner = Banner(title=title, text=text, ordering=ordering)
+            with open(image_path, 'rb') as image_file:
+                banner.image.save(image_name, File(image_file), save=False)
+            banner.save()
+            self.stdout.write(f'{title}: {banner.image.name}')
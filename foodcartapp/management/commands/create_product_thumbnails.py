@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.content_versions import CATALOGUE, bump_content_version
+from foodcartapp.models import Product
+from foodcartapp.thumbnails import create_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии картинок товаров, которых ещё нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help='Пересоздать уже существующие копии')
+
+    def handle(self, *args, **options):
+        ready_ids = []
+        failed_ids = []
+        for product in Product.objects.exclude(image='').iterator():
+            try:
+                saved_names = create_thumbnails(product.image, overwrite=options['overwrite'])
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'{product.name}: {error}')
+                failed_ids.append(product.id)
+                continue
+            ready_ids.append(product.id)
+            if saved_names:
+                self.stdout.write(f'{product.name}: {", ".join(saved_names)}')
+
+        updated_count = Product.objects.filter(pk__in=ready_ids, thumbnails_ready=False).update(thumbnails_ready=True)
+        updated_count += Product.objects.filter(pk__in=failed_ids, thumbnails_ready=True).update(thumbnails_ready=False)
+        if updated_count:
+            bump_content_version(CATALOGUE)
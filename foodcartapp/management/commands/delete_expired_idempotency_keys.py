@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.idempotency import get_expiration_border
+from foodcartapp.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Удаляет ключи Idempotency-Key старше IDEMPOTENCY_KEY_TTL_HOURS'
+
+    def handle(self, *args, **options):
+        deleted_count, __ = IdempotencyKey.objects.filter(created_at__lt=get_expiration_border()).delete()
+        self.stdout.write(f'Удалено ключей: {deleted_count}')
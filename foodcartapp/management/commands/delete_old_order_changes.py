@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodcartapp.models import OrderChange
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые записи журнала изменений заказов, по которому обновляется страница заказов менеджера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Записи старше скольких часов удалить')
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(hours=options['hours'])
+        deleted_count, __ = OrderChange.objects.filter(changed_at__lt=border).delete()
+        self.stdout.write(f'Удалено записей: {deleted_count}')
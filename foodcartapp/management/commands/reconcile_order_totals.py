@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order, OrderChange
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает стоимость и число позиций заказов, которые разошлись с их позициями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать расхождения, ничего не менять')
+
+    def handle(self, *args, **options):
+        drifted_orders = list(Order.objects.drifted().values(
+            'id', 'total_price', 'actual_total_price', 'items_count', 'actual_items_count',
+        ))
+        for order in drifted_orders:
+            self.stdout.write(
+                f'Заказ {order["id"]}: стоимость {order["total_price"]} -> {order["actual_total_price"]}, '
+                f'позиций {order["items_count"]} -> {order["actual_items_count"]}'
+            )
+        if not options['dry_run']:
+            Order.objects.filter(pk__in=[order['id'] for order in drifted_orders]).recalculate_totals()
+            OrderChange.objects.bulk_create(OrderChange(order_id=order['id']) for order in drifted_orders)
+        self.stdout.write(f'Расхождений: {len(drifted_orders)}')
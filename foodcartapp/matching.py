@@ -0,0 +1,30 @@
+from collections import defaultdict
+
+
+def build_product_restaurants_index(menu_items):
+    """Map product id to frozenset of ids of restaurants where it is available.
+
+    `menu_items` is an iterable of (product_id, restaurant_id) pairs, e.g.
+    `RestaurantMenuItem.objects.filter(availability=True).values_list('product', 'restaurant')`.
+    """
+    restaurants_by_product = defaultdict(set)
+    for product_id, restaurant_id in menu_items:
+        restaurants_by_product[product_id].add(restaurant_id)
+    return {
+        product_id: frozenset(restaurant_ids)
+        for product_id, restaurant_ids in restaurants_by_product.items()
+    }
+
+
+def find_available_restaurants(product_ids, product_restaurants_index):
+    """Return frozenset of ids of restaurants which have every product available.
+
+    An empty order can not be fulfilled by anyone, so it gets no restaurants.
+    """
+    restaurants_for_products = sorted(
+        (product_restaurants_index.get(product_id, frozenset()) for product_id in set(product_ids)),
+        key=len,
+    )
+    if not restaurants_for_products:
+        return frozenset()
+    return frozenset.intersection(*restaurants_for_products)
@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+# default banners are created by `create_default_banners` command: migrations also run
+# for every test database and must not write files into MEDIA_ROOT
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0055_banner'),
+    ]
+
+    operations = []
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0056_create_default_banners'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='restaurantmenuitem',
+            index=models.Index(fields=['product', 'availability'], name='foodcartapp_product_71ea38_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def calc_total_price_for_old_orders(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderItem = apps.get_model('foodcartapp', 'OrderItem')
+    items_total_price = (
+        OrderItem.objects
+        .filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(total_price=Sum('total_price'))
+        .values('total_price')
+    )
+    Order.objects.update(
+        total_price=Coalesce(Subquery(items_total_price), Value(0), output_field=DecimalField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0058_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Стоимость заказа'),
+        ),
+        migrations.RunPython(code=calc_total_price_for_old_orders, reverse_code=migrations.RunPython.noop)
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def calc_items_count_for_old_orders(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderItem = apps.get_model('foodcartapp', 'OrderItem')
+    items_count = (
+        OrderItem.objects
+        .filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(items_count=Count('pk'))
+        .values('items_count')
+    )
+    Order.objects.update(items_count=Coalesce(Subquery(items_count), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0059_order_total_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Позиций в заказе'),
+        ),
+        migrations.RunPython(code=calc_items_count_for_old_orders, reverse_code=migrations.RunPython.noop)
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 17:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_order_items_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.PositiveIntegerField(verbose_name='id заказа')),
+                ('changed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='время изменения')),
+            ],
+            options={
+                'verbose_name': 'изменение заказа',
+                'verbose_name_plural': 'изменения заказов',
+            },
+        ),
+    ]
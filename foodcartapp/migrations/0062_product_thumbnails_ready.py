@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 17:36
+
+import os
+
+from django.db import migrations, models
+from PIL import features
+
+
+# a snapshot of foodcartapp.thumbnails naming, migrations must not change with the app code
+THUMBNAIL_WIDTHS = [100, 300, 600]
+THUMBNAIL_EXTENSION = 'webp' if features.check('webp') else 'jpg'
+
+
+def thumbnails_exist(image):
+    stem, _ = os.path.splitext(image.name)
+    return all(
+        image.storage.exists(f'{stem}_{width}w.{THUMBNAIL_EXTENSION}')
+        for width in THUMBNAIL_WIDTHS
+    )
+
+
+def mark_products_with_thumbnails(apps, schema_editor):
+    Product = apps.get_model('foodcartapp', 'Product')
+    ready_ids = [
+        product.id
+        for product in Product.objects.exclude(image='').iterator()
+        if thumbnails_exist(product.image)
+    ]
+    Product.objects.filter(pk__in=ready_ids).update(thumbnails_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0061_orderchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='уменьшенные копии готовы'),
+        ),
+        migrations.RunPython(code=mark_products_with_thumbnails, reverse_code=migrations.RunPython.noop)
+    ]
@@ -1,6 +1,11 @@
+from collections import defaultdict
+from copy import copy
+
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Prefetch
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from phonenumber_field.modelfields import PhoneNumberField
@@ -33,12 +38,11 @@ class Restaurant(models.Model):
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
-            RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
+        available_menu_items = RestaurantMenuItem.objects.filter(
+            product=OuterRef('pk'),
+            availability=True,
         )
-        return self.filter(pk__in=products)
+        return self.filter(Exists(available_menu_items))
 
 
 class ProductCategory(models.Model):
@@ -87,6 +91,11 @@ class Product(models.Model):
         max_length=200,
         blank=True,
     )
+    thumbnails_ready = models.BooleanField(
+        'уменьшенные копии готовы',
+        default=False,
+        editable=False,
+    )
 
     objects = ProductQuerySet.as_manager()
 
@@ -123,25 +132,89 @@ class RestaurantMenuItem(models.Model):
         unique_together = [
             ['restaurant', 'product']
         ]
+        indexes = [
+            models.Index(fields=['product', 'availability']),
+        ]
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
 class OrderQuerySet(models.QuerySet):
+    def restaurant_candidates(self):
+        """Return (order, restaurant) pairs where restaurant has every product of order available.
+
+        Order items are joined to available menu items and grouped by order and restaurant,
+        pair is kept when count of matched products equals count of distinct products in order.
+        """
+        order_products_count = (
+            OrderItem.objects
+            .filter(order=OuterRef('order'))
+            .values('order')
+            .annotate(products_count=Count('product', distinct=True))
+            .values('products_count')
+        )
+        return (
+            OrderItem.objects
+            .filter(order__in=self.values('pk'), product__menu_items__availability=True)
+            .values('order', restaurant=F('product__menu_items__restaurant'))
+            .annotate(matched_products_count=Count('product', distinct=True))
+            .filter(matched_products_count=Subquery(order_products_count))
+            .values('order', 'restaurant')
+        )
+
+    def fulfillable_by(self, restaurant):
+        """Return orders which `restaurant`, an instance or an id, can fulfill."""
+        restaurant_id = getattr(restaurant, 'pk', restaurant)
+        candidates = self.restaurant_candidates().filter(restaurant=restaurant_id)
+        return self.filter(pk__in=candidates.values('order'))
+
     def fetch_available_restaurants(self):
-        orders = self.prefetch_related(Prefetch('items', queryset=OrderItem.objects.select_related('product')))
-        menu_items = RestaurantMenuItem.objects.filter(availability=True).select_related('restaurant', 'product')
+        orders = list(self)
+        # candidates are looked up by fetched ids, so sliced querysets work too
+        candidates = (
+            Order.objects
+            .filter(pk__in=[order.pk for order in orders])
+            .restaurant_candidates()
+            .order_by('restaurant')
+        )
+        restaurants = Restaurant.objects.in_bulk()
+
+        restaurants_by_order = defaultdict(list)
+        for candidate in candidates:
+            # every order gets own copies, because distances are attached to restaurants per order
+            restaurant = copy(restaurants[candidate['restaurant']])
+            restaurants_by_order[candidate['order']].append(restaurant)
 
         for order in orders:
-            restaurants_for_products = []
-            for order_item in order.items.all():
-                restaurants_for_product = [m.restaurant for m in menu_items if m.product == order_item.product]
-                restaurants_for_products.append(set(restaurants_for_product))
-            order.restaurants = list(set.intersection(*restaurants_for_products))
+            order.restaurants = restaurants_by_order[order.id]
 
         return orders
 
+    def with_actual_totals(self):
+        """Annotate orders with total price and count of items calculated from their items."""
+        return self.annotate(**get_actual_totals_expressions('actual_'))
+
+    def drifted(self):
+        """Return orders whose stored totals don't match their items."""
+        return self.with_actual_totals().exclude(
+            total_price=F('actual_total_price'),
+            items_count=F('actual_items_count'),
+        )
+
+    def recalculate_totals(self):
+        return self.update(**get_actual_totals_expressions())
+
+
+def get_actual_totals_expressions(prefix=''):
+    order_items = OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+    items_total_price = order_items.annotate(total_price=Sum('total_price')).values('total_price')
+    items_count = order_items.annotate(items_count=Count('pk')).values('items_count')
+    return {
+        f'{prefix}total_price': Coalesce(Subquery(items_total_price), Value(0), output_field=DecimalField()),
+        f'{prefix}items_count': Coalesce(Subquery(items_count), Value(0)),
+    }
+
 
 class Order(models.Model):
     NEW = 1
@@ -171,6 +244,8 @@ class Order(models.Model):
     delivered_at = models.DateTimeField(null=True, blank=True, verbose_name='Время доставки', db_index=True)
     payment_method = models.IntegerField(choices=PAYMENT_METHOD_CHOICES, verbose_name='Способ оплаты', null=True, db_index=True)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders', verbose_name='Ресторан')
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, validators=[MinValueValidator(0)], verbose_name='Стоимость заказа')
+    items_count = models.PositiveIntegerField(default=0, verbose_name='Позиций в заказе')
 
     objects = OrderQuerySet.as_manager()
 
@@ -194,3 +269,51 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f'{self.product.name} {self.order}'
+
+
+class Banner(models.Model):
+    title = models.CharField('заголовок', max_length=50)
+    image = models.ImageField('картинка')
+    text = models.CharField('текст', max_length=200, blank=True)
+    ordering = models.PositiveIntegerField('порядок', default=0, db_index=True)
+    active_from = models.DateTimeField('показывать с', null=True, blank=True)
+    active_until = models.DateTimeField('показывать до', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['ordering', 'id']
+
+    def __str__(self):
+        return self.title
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField('ключ', max_length=255, unique=True)
+    request_hash = models.CharField('хэш запроса', max_length=64)
+    response_status = models.PositiveSmallIntegerField('код ответа')
+    response_body = models.JSONField('тело ответа', encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField('создан', default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+
+    def __str__(self):
+        return self.key
+
+
+class OrderChange(models.Model):
+    """Log of created, changed and deleted orders for the live orders board.
+
+    Not a foreign key, so the log outlives deleted orders.
+    """
+    order_id = models.PositiveIntegerField('id заказа')
+    changed_at = models.DateTimeField('время изменения', default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'изменение заказа'
+        verbose_name_plural = 'изменения заказов'
+
+    def __str__(self):
+        return f'{self.order_id} {self.changed_at}'
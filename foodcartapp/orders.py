@@ -0,0 +1,134 @@
+import logging
+
+from django.conf import settings
+from django.db import connection, DatabaseError, transaction
+
+from place.crud_helpers import enqueue_addresses
+
+from .models import Order, OrderChange, OrderItem
+
+
+logger = logging.getLogger(__name__)
+
+CREATED = 'created'
+INVALID = 'invalid'
+FAILED = 'failed'
+SAVE_FAILED_MESSAGE = 'Не удалось сохранить заказ, попробуйте отправить его ещё раз'
+
+
+def build_order(order_data):
+    return Order(
+        firstname=order_data['firstname'],
+        lastname=order_data['lastname'],
+        phonenumber=order_data['phonenumber'],
+        address=order_data['address'],
+        total_price=sum(item['quantity'] * item['product'].price for item in order_data['products']),
+        items_count=len(order_data['products']),
+    )
+
+
+def build_order_items(order, products_data):
+    return [
+        OrderItem(
+            order=order,
+            product=item['product'],
+            quantity=item['quantity'],
+            total_price=item['quantity'] * item['product'].price,
+        )
+        for item in products_data
+    ]
+
+
+def serialize_created_order(order, order_items):
+    """Dump just saved order from objects in memory, without queries.
+
+    Decimals are dumped as strings like DRF serializers do.
+    """
+    return {
+        'id': order.id,
+        'status': order.status,
+        'firstname': order.firstname,
+        'lastname': order.lastname,
+        'phonenumber': str(order.phonenumber),
+        'address': order.address,
+        'products': [
+            {
+                'product': item.product.id,
+                'quantity': item.quantity,
+                'total_price': str(item.total_price),
+            }
+            for item in order_items
+        ],
+        'total_price': str(order.total_price),
+        'items_count': order.items_count,
+    }
+
+
+def collect_product_ids(raw_orders):
+    """Collect ids of all products mentioned in not yet validated orders.
+
+    Malformed entries are skipped here, serializer will report them.
+    """
+    product_ids = set()
+    for raw_order in raw_orders:
+        if not isinstance(raw_order, dict) or not isinstance(raw_order.get('products'), list):
+            continue
+        for item in raw_order['products']:
+            if not isinstance(item, dict):
+                continue
+            try:
+                product_ids.add(int(item.get('product')))
+            except (TypeError, ValueError):
+                continue
+    return product_ids
+
+
+def create_orders(orders_data):
+    """Save validated orders with their items, return list of saved orders.
+
+    Backends which can't return primary keys from bulk insert, e.g. SQLite,
+    get orders inserted one by one, items are always inserted in bulk.
+    """
+    orders = [build_order(order_data) for order_data in orders_data]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Order.objects.bulk_create(orders)
+        # bulk_create sends no post_save, so the change log is written here
+        OrderChange.objects.bulk_create(OrderChange(order_id=order.pk) for order in orders)
+    else:
+        for order in orders:
+            order.save(force_insert=True)
+
+    order_items = []
+    for order, order_data in zip(orders, orders_data):
+        order_items.extend(build_order_items(order, order_data['products']))
+    OrderItem.objects.bulk_create(order_items)
+    return orders
+
+
+def create_orders_in_chunks(indexed_orders_data, chunk_size=None):
+    """Save validated orders in separate transactions of `chunk_size` orders.
+
+    `indexed_orders_data` is a list of (index, validated_data) pairs. Returns
+    dict index -> result. If a chunk fails, only orders of that chunk are
+    reported as failed, the rest are saved.
+    """
+    chunk_size = chunk_size or settings.BULK_ORDERS_CHUNK_SIZE
+    results = {}
+    addresses = []
+    for chunk_start in range(0, len(indexed_orders_data), chunk_size):
+        chunk = indexed_orders_data[chunk_start:chunk_start + chunk_size]
+        try:
+            with transaction.atomic():
+                orders = create_orders([order_data for __, order_data in chunk])
+        except DatabaseError:
+            # database errors may reveal the schema, clients get a generic message
+            logger.exception('Can not save orders %s', [index for index, __ in chunk])
+            for index, __ in chunk:
+                results[index] = {'index': index, 'status': FAILED, 'errors': [SAVE_FAILED_MESSAGE]}
+            continue
+        for (index, __), order in zip(chunk, orders):
+            results[index] = {'index': index, 'status': CREATED, 'id': order.id, 'total_price': str(order.total_price)}
+            addresses.append(order.address)
+    if addresses:
+        enqueue_addresses(addresses)
+    return results
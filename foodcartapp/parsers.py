@@ -0,0 +1,27 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline delimited JSON into a list, one document per line.
+
+    Blank lines are skipped. See http://ndjson.org/
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        documents = []
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                documents.append(json.loads(line.decode(encoding)))
+            except ValueError as error:
+                raise ParseError(f'NDJSON parse error on line {line_number}: {error}')
+        return documents
@@ -0,0 +1,9 @@
+from rest_framework.permissions import BasePermission
+
+
+class CanAddOrders(BasePermission):
+    """Let in partners whose user has the `add_order` permission, e.g. via a group in admin."""
+    message = 'Нужно право на добавление заказов'
+
+    def has_permission(self, request, view):
+        return request.user.has_perm('foodcartapp.add_order')
@@ -1,9 +1,11 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import IntegerField, ModelSerializer, ValidationError
 
-from .models import Order, OrderItem
+from .models import Order, OrderItem, Product
 
 
 class OrderItemSerializer(ModelSerializer):
+    product = IntegerField(min_value=1)
+
     class Meta:
         model = OrderItem
         fields = ['product', 'quantity']
@@ -15,4 +17,20 @@ class OrderSerializer(ModelSerializer):
         model = Order
         fields = ['firstname', 'lastname', 'phonenumber', 'address', 'products']
 
+    def validate_products(self, items):
+        """Replace product ids with products fetched in one query.
+
+        A batch of orders may share products preloaded into `products` dict
+        of serializer context, then no query is made at all.
+        """
+        product_ids = {item['product'] for item in items}
+        products = self.context.get('products')
+        if products is None:
+            products = Product.objects.in_bulk(product_ids)
 
+        missing_ids = sorted(product_ids - products.keys())
+        if missing_ids:
+            raise ValidationError(
+                f'Товары не найдены: {", ".join(str(product_id) for product_id in missing_ids)}'
+            )
+        return [{**item, 'product': products[item['product']]} for item in items]
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .content_versions import BANNERS, CATALOGUE, bump_content_version
+from .models import Banner, Order, OrderChange, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .thumbnails import create_thumbnails_safely
+
+
+@receiver(post_save, sender=Product)
+def create_product_thumbnails(sender, instance, **kwargs):
+    thumbnails_ready = create_thumbnails_safely(instance.image)
+    if thumbnails_ready != instance.thumbnails_ready:
+        # update() sends no post_save, the catalogue is invalidated by the save being handled
+        Product.objects.filter(pk=instance.pk).update(thumbnails_ready=thumbnails_ready)
+        instance.thumbnails_ready = thumbnails_ready
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def invalidate_catalogue(sender, **kwargs):
+    bump_content_version(CATALOGUE)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_banners(sender, **kwargs):
+    bump_content_version(BANNERS)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def log_order_change(sender, instance, **kwargs):
+    OrderChange.objects.create(order_id=instance.pk)
@@ -0,0 +1,309 @@
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from .idempotency import get_request_hash
+from .matching import build_product_restaurants_index, find_available_restaurants
+from .models import IdempotencyKey, Order, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .orders import create_orders
+from .serializers import OrderSerializer
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_image_file(name='burger.jpg'):
+    image_file = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(image_file, 'JPEG')
+    return SimpleUploadedFile(name, image_file.getvalue(), content_type='image/jpeg')
+
+
+class MatchingTest(SimpleTestCase):
+    def setUp(self):
+        self.index = build_product_restaurants_index([(1, 10), (1, 20), (2, 20), (2, 30), (3, 30)])
+
+    def test_restaurants_with_every_product_are_found(self):
+        self.assertEqual(find_available_restaurants([1, 2], self.index), {20})
+        self.assertEqual(find_available_restaurants([1, 1], self.index), {10, 20})
+
+    def test_unknown_product_matches_no_restaurant(self):
+        self.assertEqual(find_available_restaurants([1, 4], self.index), frozenset())
+
+    def test_empty_order_matches_no_restaurant(self):
+        self.assertEqual(find_available_restaurants([], self.index), frozenset())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CatalogueTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = ProductCategory.objects.create(name='Бургеры')
+        cls.restaurant = Restaurant.objects.create(name='Star Burger Арбат', address='Москва, Арбат 1')
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', category=category, price=100 + number, image=create_image_file())
+            for number in range(20)
+        ]
+        RestaurantMenuItem.objects.bulk_create(
+            RestaurantMenuItem(restaurant=cls.restaurant, product=product, availability=True)
+            for product in cls.products
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+
+class ProductListApiTest(CatalogueTestCase):
+    def test_not_modified_response_runs_no_queries(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_change_invalidates_etag(self):
+        etag = self.client.get('/api/products/')['ETag']
+        self.products[0].price = 1000
+        self.products[0].save()
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_filtered_pages_are_served_from_cache(self):
+        self.client.get('/api/products/')
+        category_id = self.products[0].category_id
+        product_ids = [product.id for product in self.products]
+
+        with self.assertNumQueries(0):
+            first_page = self.client.get(f'/api/products/?category={category_id}&limit=15&fields=id').json()
+            second_page = self.client.get(first_page['next']).json()
+            special_products = self.client.get('/api/products/?special=true').json()
+
+        self.assertEqual([product['id'] for product in first_page['results']], product_ids[:15])
+        self.assertEqual([product['id'] for product in second_page['results']], product_ids[15:])
+        self.assertIsNone(second_page['next'])
+        self.assertEqual(special_products, [])
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get('/api/products/?category=burgers&limit=0')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'category', 'limit'})
+
+    def test_only_served_thumbnails_are_made(self):
+        product = self.products[0]
+        dumped_product = self.client.get('/api/products/?fields=image_srcset&limit=1').json()['results'][0]
+        served_names = [
+            url.split()[0].replace(settings.MEDIA_URL, '', 1)
+            for url in dumped_product['image_srcset'].split(', ')
+        ]
+        stem, _ = os.path.splitext(product.image.name)
+        made_names = [name for name in os.listdir(MEDIA_ROOT) if re.fullmatch(rf'{stem}_\d+w\.\w+', name)]
+        self.assertCountEqual(made_names, served_names)
+
+    def test_missing_thumbnails_fall_back_to_original_image(self):
+        product = self.products[0]
+        self.assertTrue(product.thumbnails_ready)
+        Product.objects.filter(pk=product.pk).update(image='missing.jpg', thumbnails_ready=False)
+        product.refresh_from_db()
+        with self.assertLogs('foodcartapp.thumbnails', 'ERROR'):
+            product.save()  # thumbnails of a missing image can't be made
+
+        dumped_product = next(
+            dumped_product
+            for dumped_product in self.client.get('/api/products/').json()
+            if dumped_product['id'] == product.id
+        )
+        self.assertEqual(dumped_product['image_thumb'], dumped_product['image'])
+        self.assertIsNone(dumped_product['image_srcset'])
+
+
+class AvailableProductsQueryPlanTest(CatalogueTestCase):
+    def get_availability_index_name(self):
+        return RestaurantMenuItem._meta.indexes[0].name
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan')
+    def test_sqlite_uses_covering_index(self):
+        plan = Product.objects.available().explain()
+        self.assertIn(f'USING COVERING INDEX {self.get_availability_index_name()}', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL query plan')
+    def test_postgresql_uses_availability_index(self):
+        with connection.cursor() as cursor:
+            # tables of a test are tiny, make the planner pick an index whenever it can use one
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Product.objects.available().explain()
+        self.assertIn(self.get_availability_index_name(), plan)
+
+
+class OrderSerializerTest(CatalogueTestCase):
+    def get_order_data(self, product_ids):
+        return {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тверская 1',
+            'products': [{'product': product_id, 'quantity': 2} for product_id in product_ids],
+        }
+
+    def test_products_are_fetched_with_one_query(self):
+        serializer = OrderSerializer(data=self.get_order_data([product.id for product in self.products]))
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            [item['product'] for item in serializer.validated_data['products']],
+            self.products,
+        )
+
+    def test_unknown_products_are_reported_together(self):
+        missing_ids = [100001, 100002]
+        serializer = OrderSerializer(data=self.get_order_data([self.products[0].id, *missing_ids]))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['products'], ['Товары не найдены: 100001, 100002'])
+
+
+@override_settings(BULK_ORDERS_CHUNK_SIZE=1)
+class BulkOrdersApiTest(CatalogueTestCase):
+    def setUp(self):
+        super().setUp()
+        partner = User.objects.create_user('partner')
+        partner.user_permissions.add(Permission.objects.get(codename='add_order'))
+        self.client.force_login(partner)
+
+    def get_order_data(self, firstname='Иван'):
+        return {
+            'firstname': firstname,
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тверская 1',
+            'products': [{'product': self.products[0].id, 'quantity': 2}],
+        }
+
+    def post_orders(self, orders):
+        return self.client.post('/api/orders/bulk/', orders, content_type='application/json')
+
+    def test_users_without_permission_are_rejected(self):
+        self.client.logout()
+        self.assertEqual(self.post_orders([self.get_order_data()]).status_code, 403)
+
+        self.client.force_login(User.objects.create_user('stranger'))
+        self.assertEqual(self.post_orders([self.get_order_data()]).status_code, 403)
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_orders_are_reported_with_multi_status(self):
+        invalid_order = {**self.get_order_data(), 'products': []}
+        response = self.post_orders([self.get_order_data(), invalid_order])
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual([result['status'] for result in response.json()['results']], ['created', 'invalid'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_ndjson_orders_are_accepted(self):
+        body = '\n'.join(json.dumps(self.get_order_data(firstname)) for firstname in ['Иван', 'Пётр'])
+        response = self.client.post('/api/orders/bulk/', body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(Order.objects.order_by('id').values_list('firstname', flat=True)), ['Иван', 'Пётр'])
+
+    def test_failed_chunk_does_not_reveal_database_error(self):
+        def create_orders_or_fail(orders_data):
+            if orders_data[0]['firstname'] == 'Сбой':
+                raise DatabaseError('secret schema details')
+            return create_orders(orders_data)
+
+        with mock.patch('foodcartapp.orders.create_orders', create_orders_or_fail):
+            with self.assertLogs('foodcartapp.orders', 'ERROR'):
+                response = self.post_orders([self.get_order_data(), self.get_order_data('Сбой')])
+
+        self.assertEqual(response.status_code, 207)
+        failed_result = response.json()['results'][1]
+        self.assertEqual(failed_result['status'], 'failed')
+        self.assertNotIn('secret', json.dumps(failed_result))
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class IdempotentOrderApiTest(CatalogueTestCase):
+    def get_order_data(self, quantity=2):
+        return {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тверская 1',
+            'products': [{'product': self.products[0].id, 'quantity': quantity}],
+        }
+
+    def post_order(self, order_data, key='order-1'):
+        return self.client.post('/api/order/', order_data, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first_response = self.post_order(self.get_order_data())
+        retry_response = self.post_order(self.get_order_data())
+
+        self.assertEqual(first_response.status_code, 201)
+        self.assertEqual(retry_response.status_code, 201)
+        self.assertEqual(retry_response.json(), first_response.json())
+        self.assertEqual(retry_response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_other_data_is_rejected(self):
+        self.post_order(self.get_order_data())
+        response = self.post_order(self.get_order_data(quantity=3))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_is_used_again(self):
+        self.post_order(self.get_order_data())
+        IdempotencyKey.objects.update(created_at=timezone.now() - settings.IDEMPOTENCY_KEY_TTL - timedelta(minutes=1))
+        response = self.post_order(self.get_order_data(quantity=3))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.get().request_hash, get_request_hash(self.get_order_data(quantity=3)))
+
+    def test_concurrent_request_with_same_key_is_replayed(self):
+        IdempotencyKey.objects.create(
+            key='order-1',
+            request_hash=get_request_hash(self.get_order_data()),
+            response_status=201,
+            response_body={'id': 1},
+        )
+        filter_keys = IdempotencyKey.objects.filter
+        lookups = []
+
+        def miss_first_lookup(*args, **kwargs):
+            lookups.append(kwargs)
+            if len(lookups) == 1:
+                # the concurrent request saves its key after this lookup
+                return IdempotencyKey.objects.none()
+            return filter_keys(*args, **kwargs)
+
+        with mock.patch.object(IdempotencyKey.objects, 'filter', miss_first_lookup):
+            response = self.post_order(self.get_order_data())
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(response.json(), {'id': 1})
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,90 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import features, Image
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTHS = [100, 300, 600]
+THUMBNAIL_WIDTH = 300
+
+# thumbnails are made in one format, the one served; Pillow may be built without libwebp
+THUMBNAIL_EXTENSION, THUMBNAIL_FORMAT = ('webp', 'WEBP') if features.check('webp') else ('jpg', 'JPEG')
+
+
+def get_thumbnail_name(image_name, width):
+    stem, _ = os.path.splitext(image_name)
+    return f'{stem}_{width}w.{THUMBNAIL_EXTENSION}'
+
+
+def get_thumbnail_url(image, width=THUMBNAIL_WIDTH):
+    if not image:
+        return None
+    return image.storage.url(get_thumbnail_name(image.name, width))
+
+
+def get_srcset(image):
+    if not image:
+        return None
+    return ', '.join(
+        f'{get_thumbnail_url(image, width)} {width}w'
+        for width in THUMBNAIL_WIDTHS
+    )
+
+
+def create_thumbnails(image, overwrite=False):
+    """Save resized copies of the image next to the original, one per width.
+
+    Existing thumbnails are kept unless `overwrite` is set. Returns names of saved files.
+    """
+    storage = image.storage
+    missing_widths = [
+        width for width in THUMBNAIL_WIDTHS
+        if overwrite or not storage.exists(get_thumbnail_name(image.name, width))
+    ]
+    if not missing_widths:
+        return []
+
+    with image.open('rb'):
+        original = Image.open(image)
+        original.load()
+    original = original.convert('RGB')
+
+    saved_names = []
+    for width in missing_widths:
+        thumbnail = original.copy()
+        # never upscale, keep aspect ratio
+        thumbnail.thumbnail((width, original.height))
+        buffer = BytesIO()
+        thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=80)
+
+        name = get_thumbnail_name(image.name, width)
+        if storage.exists(name):
+            storage.delete(name)
+        saved_names.append(storage.save(name, ContentFile(buffer.getvalue())))
+    return saved_names
+
+
+def create_thumbnails_safely(image):
+    """Create thumbnails without breaking the caller when image is missing or broken.
+
+    Returns whether all thumbnails are in place.
+    """
+    if not image:
+        return False
+    try:
+        create_thumbnails(image)
+    except (OSError, ValueError):
+        logger.exception('Can not create thumbnails for %s', image.name)
+        return False
+    return True
+
+
+def thumbnails_exist(image):
+    return bool(image) and all(
+        image.storage.exists(get_thumbnail_name(image.name, width))
+        for width in THUMBNAIL_WIDTHS
+    )
@@ -1,87 +1,147 @@
+from django.conf import settings
 from django.db import transaction
-from django.http import JsonResponse
-from django.templatetags.static import static
-from rest_framework.decorators import api_view
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from rest_framework.status import HTTP_201_CREATED
+from rest_framework.status import HTTP_201_CREATED, HTTP_207_MULTI_STATUS, HTTP_400_BAD_REQUEST
 
-from .models import Order, OrderItem, Product
+from place.crud_helpers import enqueue_addresses
+
+from .banners import get_active_banners, get_banners_etag, get_banners_last_modified, serialize_banners
+from .catalogue import get_dumped_products, get_serialized_products, get_serialized_restaurant_menu
+from .content_versions import CATALOGUE, content_version_condition
+from .filters import encode_cursor, filter_dumped_products, ProductFilter, ProductsPageForm
+from .idempotency import idempotent
+from .json_encoding import dump_json, wants_pretty_json
+from .models import OrderItem, Product
+from .orders import (
+    build_order, build_order_items, collect_product_ids, create_orders_in_chunks, CREATED, INVALID,
+    serialize_created_order,
+)
+from .parsers import NDJSONParser
+from .permissions import CanAddOrders
 from .serializers import OrderSerializer
 
 
+@cache_control(public=True, max_age=settings.CATALOGUE_MAX_AGE, must_revalidate=True)
+@condition(etag_func=get_banners_etag, last_modified_func=get_banners_last_modified)
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    banners = serialize_banners(get_active_banners())
+    return HttpResponse(dump_json(banners, pretty=wants_pretty_json(request)), content_type='application/json')
 
 
+@cache_control(public=True, max_age=settings.CATALOGUE_MAX_AGE, must_revalidate=True)
+@content_version_condition(CATALOGUE)
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            },
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
+    pretty = wants_pretty_json(request)
+    if not set(request.GET.keys()) - {'pretty'}:
+        body = get_serialized_products(pretty=pretty)
+        return HttpResponse(body, content_type='application/json')
+
+    products_filter = ProductFilter(request.GET, queryset=Product.objects.none())
+    page_form = ProductsPageForm(request.GET)
+    if not products_filter.is_valid() or not page_form.is_valid():
+        errors = {
+            field: list(messages)
+            for field, messages in [*products_filter.errors.items(), *page_form.errors.items()]
         }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+        return HttpResponseBadRequest(dump_json(errors, pretty=pretty), content_type='application/json')
+
+    limit = page_form.cleaned_data['limit']
+    dumped_products = filter_dumped_products(
+        get_dumped_products(),
+        products_filter.form.cleaned_data,
+        cursor=page_form.cleaned_data['cursor'],
+    )
+    if limit:
+        has_next_page = len(dumped_products) > limit
+        dumped_products = dumped_products[:limit]
+        last_product_id = dumped_products[-1]['id'] if dumped_products else None
+
+    fields = page_form.cleaned_data['fields']
+    if fields:
+        dumped_products = [
+            {field: product[field] for field in fields}
+            for product in dumped_products
+        ]
+
+    if not limit:
+        return HttpResponse(dump_json(dumped_products, pretty=pretty), content_type='application/json')
+
+    next_page_url = None
+    if has_next_page:
+        next_page_params = request.GET.copy()
+        next_page_params['cursor'] = encode_cursor(last_product_id)
+        next_page_url = f'{request.path}?{next_page_params.urlencode()}'
+    page = {
+        'results': dumped_products,
+        'next': next_page_url,
+    }
+    return HttpResponse(dump_json(page, pretty=pretty), content_type='application/json')
+
+
+@cache_control(public=True, max_age=settings.CATALOGUE_MAX_AGE, must_revalidate=True)
+@content_version_condition(CATALOGUE)
+def restaurant_menu_api(request, restaurant_id):
+    body = get_serialized_restaurant_menu(restaurant_id, pretty=wants_pretty_json(request))
+    if body is None:
+        raise Http404('Ресторан не найден')
+    return HttpResponse(body, content_type='application/json')
 
 
 @api_view(['POST'])
+@idempotent
 @transaction.atomic
 def register_order(request):
     serializer = OrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
     order_data = serializer.validated_data
-    new_order = Order.objects.create(
-        firstname=order_data['firstname'],
-        lastname=order_data['lastname'],
-        phonenumber=order_data['phonenumber'],
-        address=order_data['address'],
-    )
-    order_items = []
-    for item in order_data['products']:
-        order_items.append(OrderItem(
-            order=new_order,
-            product=item['product'],
-            quantity=item['quantity'],
-            total_price=item['quantity'] * item['product'].price
-        ))
+    new_order = build_order(order_data)
+    new_order.save()
+    order_items = build_order_items(new_order, order_data['products'])
     OrderItem.objects.bulk_create(order_items)
-    serializer = OrderSerializer(new_order)
-    return Response(serializer.data, status=HTTP_201_CREATED)
+    enqueue_addresses([new_order.address])
+    return Response(serialize_created_order(new_order, order_items), status=HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+@permission_classes([CanAddOrders])
+def register_orders_bulk(request):
+    raw_orders = request.data
+    if not isinstance(raw_orders, list) or not raw_orders:
+        raise ValidationError({'non_field_errors': ['Ожидается непустой список заказов']})
+    if len(raw_orders) > settings.BULK_ORDERS_MAX_COUNT:
+        raise ValidationError({
+            'non_field_errors': [f'Не больше {settings.BULK_ORDERS_MAX_COUNT} заказов за раз'],
+        })
+
+    products = Product.objects.in_bulk(collect_product_ids(raw_orders))
+    results = {}
+    valid_orders = []
+    for index, raw_order in enumerate(raw_orders):
+        serializer = OrderSerializer(data=raw_order, context={'products': products})
+        if serializer.is_valid():
+            valid_orders.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': INVALID, 'errors': serializer.errors}
+    results.update(create_orders_in_chunks(valid_orders))
+
+    results = [results[index] for index in range(len(raw_orders))]
+    created_count = sum(result['status'] == CREATED for result in results)
+    if created_count == len(results):
+        status = HTTP_201_CREATED
+    elif created_count:
+        status = HTTP_207_MULTI_STATUS
+    else:
+        status = HTTP_400_BAD_REQUEST
+    return Response({
+        'created': created_count,
+        'rejected': len(results) - created_count,
+        'results': results,
+    }, status=status)
@@ -0,0 +1,42 @@
+import re
+
+
+ABBREVIATIONS = {
+    'город': 'г',
+    'улица': 'ул',
+    'дом': 'д',
+    'проспект': 'пр-кт',
+    'пр-т': 'пр-кт',
+    'просп': 'пр-кт',
+    'переулок': 'пер',
+    'площадь': 'пл',
+    'бульвар': 'б-р',
+    'бул': 'б-р',
+    'шоссе': 'ш',
+    'набережная': 'наб',
+    'проезд': 'пр-д',
+    'корпус': 'к',
+    'корп': 'к',
+    'строение': 'стр',
+    'квартира': 'кв',
+}
+# city and street markers are too common to tell addresses apart, so they are dropped
+OMITTED_WORDS = {'г', 'ул'}
+# "д" marks a house only before its number, otherwise it is an initial like in "ул. Д. Ульянова"
+HOUSE_WORD = 'д'
+
+
+def normalize_address(address):
+    """Return the key under which equivalent spellings of an address share one Place.
+
+    "Москва, Тверская ул., д. 1" and "москва,  тверская, 1" both become "москва тверская 1".
+    """
+    address = address.casefold().replace('ё', 'е')
+    address = re.sub(r'[^\w-]+', ' ', address)
+    # "12к2" is the same building as "12 к 2"
+    address = re.sub(r'(\d)([^\W\d_]+)(\d)', r'\1 \2 \3', address)
+    words = [ABBREVIATIONS.get(word, word) for word in address.split() if word.strip('-')]
+    return ' '.join(
+        word for word, next_word in zip(words, [*words[1:], ''])
+        if word not in OMITTED_WORDS and not (word == HOUSE_WORD and next_word[:1].isdigit())
+    )
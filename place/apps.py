@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PlaceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'place'
+
+    def ready(self):
+        from place import signals  # noqa: F401
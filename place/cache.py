@@ -0,0 +1,93 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+NOT_CACHED = object()
+PLACES_VERSION_CACHE_KEY = 'place:places_version'
+
+
+class LRUCache:
+    """Bounded thread-safe in-memory cache with per-entry expiration time.
+
+    Lives inside one process, so every web worker warms up its own copy.
+    Copies are dropped together through `version`, which is shared between
+    processes, see `sync_version`.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=NOT_CACHED):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= timezone.now():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def sync_version(self, version):
+        """Drop all entries if the shared version changed since the last call."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def get_places_version():
+    """Return version of geocoded places, which changes every time places are rewritten.
+
+    Version lives in the Django cache, so all processes see the same one. When the
+    cache loses it, a new version is started and in-process caches are dropped once.
+    """
+    version = cache.get(PLACES_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(PLACES_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(PLACES_VERSION_CACHE_KEY)
+    return version
+
+
+def bump_places_version():
+    cache.set(PLACES_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+places_coordinates_cache = LRUCache(settings.PLACES_CACHE_SIZE)
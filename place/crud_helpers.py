@@ -1,25 +1,130 @@
-from requests import HTTPError
+from django.utils import timezone
 
-from place.models import Place
-from place.yandex_geocoder_api import fetch_coordinates_from_yandex_api, PlaceDoesNotResolvedByGeocoder
+from place.addresses import normalize_address
+from place.cache import bump_places_version, get_places_version, NOT_CACHED, places_coordinates_cache
+from place.models import GeocodingTask, Place
+from place.yandex_geocoder_api import fetch_coordinates_batch, PlaceDoesNotResolvedByGeocoder
 
 
 def get_places(addresses):
-    places = Place.objects.in_bulk(addresses, field_name='address')
-    not_existed_addresses = [a for a in addresses if a not in places.keys()]
-    for address in not_existed_addresses:
-        places[address] = create_place(address)
-    return places
+    address_keys = {address: normalize_address(address) for address in addresses}
+    places = Place.objects.in_bulk(set(address_keys.values()), field_name='normalized_address')
 
+    outdated_addresses = {}
+    for address, key in address_keys.items():
+        if key not in places.keys() or places[key].is_stale():
+            outdated_addresses.setdefault(key, address)
+    places.update(geocode_places(list(outdated_addresses.values()), places))
+
+    return {address: places[key] for address, key in address_keys.items()}
+
+
+def get_places_coordinates(addresses):
+    """Return dict address -> Coordinates for geocoded addresses, served from in-process cache.
+
+    Addresses which geocoder could not find are mapped to None, addresses
+    which are not geocoded yet or failed with a transient error and have no
+    coordinates are missing from the result.
+
+    Only places already in the database are cached, each until its place gets
+    stale and is due for geocoding again. Places are rewritten by the worker
+    process, so the cache is dropped early by shared places version, see
+    `bump_places_version`.
+    """
+    places_coordinates_cache.sync_version(get_places_version())
+    coordinates = {}
+    missed_addresses = []
+    for address in dict.fromkeys(addresses):
+        cached_coordinates = places_coordinates_cache.get(normalize_address(address))
+        if cached_coordinates is NOT_CACHED:
+            missed_addresses.append(address)
+        else:
+            coordinates[address] = cached_coordinates
+
+    for address, place in get_known_places(missed_addresses).items():
+        if not place.has_coordinates and place.status != Place.NOT_FOUND:
+            continue  # a transient error of the first attempt, coordinates are still pending
+        coordinates[address] = place.coordinates
+        expires_at = place.updated_at + place.get_time_to_live()
+        places_coordinates_cache.set(place.normalized_address, place.coordinates, expires_at)
+    return coordinates
+
+
+def get_known_places(addresses):
+    """Return places which are already geocoded without going to the network.
+
+    Missing and stale addresses are put on the queue for `geocode_addresses` worker.
+    """
+    address_keys = {address: normalize_address(address) for address in addresses}
+    places = Place.objects.in_bulk(set(address_keys.values()), field_name='normalized_address')
+    now = timezone.now()
+    enqueue_addresses([
+        address for address, key in address_keys.items()
+        if key not in places.keys() or places[key].is_stale(now)
+    ])
+    return {
+        address: places[key]
+        for address, key in address_keys.items()
+        if key in places.keys()
+    }
 
-def create_place(address):
-    try:
-        coords = fetch_coordinates_from_yandex_api(address)
-    except (HTTPError, PlaceDoesNotResolvedByGeocoder):
-        coords = [0, 0]
-    finally:
-        place = Place(address=address, latitude=coords[1], longitude=coords[0])
-        place.save()
 
-    return place.longitude, place.latitude
+def enqueue_addresses(addresses):
+    tasks = [GeocodingTask(address=address) for address in dict.fromkeys(addresses)]
+    GeocodingTask.objects.bulk_create(tasks, ignore_conflicts=True)
 
+
+def geocode_places(addresses, known_places=None):
+    """Geocode addresses in one concurrent batch and save outcomes with a couple of queries.
+
+    Returns and accepts places keyed by normalized address. Not found addresses lose
+    their coordinates, transient errors keep the previous ones and are retried with
+    backoff, see `Place.get_time_to_live`.
+    """
+    if not addresses:
+        return {}
+    known_places = known_places or {}
+
+    results = fetch_coordinates_batch(addresses)
+    now = timezone.now()
+    new_places = []
+    updated_places = []
+    for address in addresses:
+        key = normalize_address(address)
+        place = known_places.get(key) or Place(address=address, normalized_address=key)
+        apply_geocoding_result(place, results[address])
+        place.updated_at = now
+        if place.pk:
+            updated_places.append(place)
+        else:
+            new_places.append(place)
+
+    # concurrent workers may geocode the same address, the first saved wins
+    Place.objects.bulk_create(new_places, ignore_conflicts=True)
+    Place.objects.bulk_update(
+        updated_places,
+        ['latitude', 'longitude', 'status', 'failed_attempts', 'updated_at'],
+    )
+    if updated_places:
+        # bulk_update sends no post_save, new places can't be cached anywhere yet
+        bump_places_version()
+
+    return {place.normalized_address: place for place in new_places + updated_places}
+
+
+def apply_geocoding_result(place, result):
+    if isinstance(result, PlaceDoesNotResolvedByGeocoder):
+        place.status = Place.NOT_FOUND
+        place.latitude = place.longitude = None
+        place.failed_attempts = 0
+    elif isinstance(result, Exception):
+        place.status = Place.TRANSIENT_ERROR
+        place.failed_attempts += 1
+    else:
+        place.status = Place.RESOLVED
+        place.longitude, place.latitude = result
+        place.failed_attempts = 0
+
+
+def create_place(address):
+    return geocode_places([address])[normalize_address(address)]
@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from geopy.distance import geodesic
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+FAST = 'fast'
+PRECISE = 'precise'
+
+Coordinates = namedtuple('Coordinates', ['lat', 'lon'])
+
+
+def calculate_distance(one_coordinates, another_coordinates, metric=None):
+    """Return distance in km, or None when any of coordinates is unknown."""
+    if one_coordinates is None or another_coordinates is None:
+        return None
+    distances = calculate_distances_matrix([one_coordinates], [another_coordinates], metric)
+    return float(distances[0, 0])
+
+
+def calculate_distances_matrix(origins, destinations, metric=None):
+    """Return matrix of distances in km between every origin and every destination.
+
+    Metric defaults to `settings.DISTANCE_METRIC`:
+    - `fast` computes haversine for all pairs in one vectorized call. Haversine treats
+      the Earth as a sphere, so results differ from `precise` by no more than 0.6%.
+    - `precise` computes geodesic distance on WGS-84 ellipsoid pair by pair.
+    """
+    metric = metric or settings.DISTANCE_METRIC
+    if metric == FAST:
+        return calculate_haversine_matrix(origins, destinations)
+    if metric == PRECISE:
+        return calculate_geodesic_matrix(origins, destinations)
+    raise ImproperlyConfigured(f'Unknown distance metric: {metric}')
+
+
+def calculate_haversine_matrix(origins, destinations):
+    origins = np.radians(np.asarray(origins, dtype=float).reshape(-1, 2))
+    destinations = np.radians(np.asarray(destinations, dtype=float).reshape(-1, 2))
+
+    origins_lat = origins[:, 0, np.newaxis]
+    origins_lon = origins[:, 1, np.newaxis]
+    destinations_lat = destinations[:, 0]
+    destinations_lon = destinations[:, 1]
+
+    haversine = (
+        np.sin((destinations_lat - origins_lat) / 2) ** 2
+        + np.cos(origins_lat) * np.cos(destinations_lat) * np.sin((destinations_lon - origins_lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0, 1)))
+
+
+def calculate_geodesic_matrix(origins, destinations):
+    distances = [
+        [geodesic(origin, destination).km for destination in destinations]
+        for origin in origins
+    ]
+    return np.array(distances, dtype=float).reshape(len(origins), len(destinations))
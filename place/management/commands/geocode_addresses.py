@@ -0,0 +1,80 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from place.crud_helpers import get_places
+from place.models import GeocodingTask
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Геокодирует адреса из очереди и сохраняет их координаты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.YANDEX_GEOCODER_MAX_WORKERS,
+            help='Сколько адресов геокодировать за раз, по умолчанию YANDEX_GEOCODER_MAX_WORKERS — пачка за один заход к Геокодеру',
+        )
+        parser.add_argument('--loop', action='store_true', help='Не завершаться, когда очередь опустеет')
+        parser.add_argument('--sleep', type=float, default=5, help='Пауза в секундах между проверками пустой очереди')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='После скольких неудачных попыток убрать адрес из очереди',
+        )
+
+    def handle(self, *args, **options):
+        # without --loop only tasks queued before start are taken, failed ones wait for the next run
+        queued_before = None if options['loop'] else timezone.now()
+        while True:
+            processed_count, succeeded = self.process_batch(
+                options['batch_size'], options['max_attempts'], queued_before,
+            )
+            if not processed_count:
+                if not options['loop']:
+                    return
+                time.sleep(options['sleep'])
+            elif not succeeded:
+                time.sleep(options['sleep'])
+
+    def process_batch(self, batch_size, max_attempts, queued_before=None):
+        """Geocode the oldest tasks, return how many were taken and whether it went well.
+
+        Rows are locked with SKIP LOCKED, so parallel workers take different
+        batches. A failed batch goes back to the end of the queue with an
+        attempt counted, so it can't stall the queue.
+        """
+        tasks = GeocodingTask.objects.select_for_update(skip_locked=True).order_by('created_at')
+        if queued_before:
+            tasks = tasks.filter(created_at__lte=queued_before)
+        with transaction.atomic():
+            tasks = list(tasks[:batch_size])
+            if not tasks:
+                return 0, True
+            task_ids = [task.pk for task in tasks]
+
+            try:
+                with transaction.atomic():
+                    get_places([task.address for task in tasks])
+            except Exception:
+                logger.exception('Can not geocode batch of %s addresses', len(tasks))
+                GeocodingTask.objects.filter(pk__in=task_ids).update(
+                    attempts=F('attempts') + 1,
+                    created_at=timezone.now(),
+                )
+                exhausted_tasks = GeocodingTask.objects.filter(pk__in=task_ids, attempts__gte=max_attempts)
+                for address in exhausted_tasks.values_list('address', flat=True):
+                    logger.error('Give up geocoding %r after %s attempts', address, max_attempts)
+                exhausted_tasks.delete()
+                self.stderr.write(f'Не удалось геокодировать адресов: {len(tasks)}')
+                return len(tasks), False
+
+            GeocodingTask.objects.filter(pk__in=task_ids).delete()
+        self.stdout.write(f'Геокодировано адресов: {len(tasks)}')
+        return len(tasks), True
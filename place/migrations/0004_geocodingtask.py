@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('place', '0003_auto_20220505_1531'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodingTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=200, unique=True, verbose_name='Адрес')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата постановки в очередь')),
+            ],
+            options={
+                'verbose_name': 'Адрес в очереди на геокодирование',
+                'verbose_name_plural': 'Адреса в очереди на геокодирование',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+def forget_zero_coordinates(apps, schema_editor):
+    # geocoder failures used to be stored as [0, 0], they have to be geocoded again
+    Place = apps.get_model('place', 'Place')
+    Place.objects.filter(latitude=0, longitude=0).update(
+        latitude=None,
+        longitude=None,
+        status=3,
+        failed_attempts=1,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('place', '0004_geocodingtask'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='place',
+            options={'verbose_name': 'Место', 'verbose_name_plural': 'Места'},
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='failed_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Неудачных попыток подряд'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='status',
+            field=models.IntegerField(choices=[(1, 'Координаты найдены'), (2, 'Адрес не найден'), (3, 'Временная ошибка геокодера')], default=1, verbose_name='Результат геокодирования'),
+        ),
+        migrations.RunPython(forget_zero_coordinates, migrations.RunPython.noop),
+    ]
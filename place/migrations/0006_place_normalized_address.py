@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+from place.addresses import normalize_address
+
+
+def merge_equivalent_places(apps, schema_editor):
+    Place = apps.get_model('place', 'Place')
+    places_by_key = {}
+    for place in Place.objects.order_by('-updated_at'):
+        places_by_key.setdefault(normalize_address(place.address), []).append(place)
+
+    for key, places in places_by_key.items():
+        # prefer the freshest place with resolved coordinates, delete the rest
+        kept_place, *duplicates = sorted(places, key=lambda place: place.status != 1)
+        Place.objects.filter(pk__in=[place.pk for place in duplicates]).delete()
+        kept_place.normalized_address = key
+        kept_place.save(update_fields=['normalized_address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('place', '0005_place_geocoding_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='normalized_address',
+            field=models.CharField(max_length=200, null=True, verbose_name='Нормализованный адрес'),
+        ),
+        migrations.RunPython(merge_equivalent_places, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='place',
+            name='normalized_address',
+            field=models.CharField(max_length=200, unique=True, verbose_name='Нормализованный адрес'),
+        ),
+        migrations.AlterField(
+            model_name='place',
+            name='address',
+            field=models.CharField(max_length=200, verbose_name='Адрес'),
+        ),
+    ]
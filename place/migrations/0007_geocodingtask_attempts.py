@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('place', '0006_place_normalized_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geocodingtask',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Неудачных попыток'),
+        ),
+    ]
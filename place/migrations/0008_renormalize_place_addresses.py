@@ -0,0 +1,64 @@
+import re
+
+from django.db import migrations
+
+
+# a snapshot of place.addresses.normalize_address, migrations must not change with the app code
+ABBREVIATIONS = {
+    'город': 'г',
+    'улица': 'ул',
+    'дом': 'д',
+    'проспект': 'пр-кт',
+    'пр-т': 'пр-кт',
+    'просп': 'пр-кт',
+    'переулок': 'пер',
+    'площадь': 'пл',
+    'бульвар': 'б-р',
+    'бул': 'б-р',
+    'шоссе': 'ш',
+    'набережная': 'наб',
+    'проезд': 'пр-д',
+    'корпус': 'к',
+    'корп': 'к',
+    'строение': 'стр',
+    'квартира': 'кв',
+}
+OMITTED_WORDS = {'г', 'ул'}
+HOUSE_WORD = 'д'
+
+
+def normalize_address(address):
+    address = address.casefold().replace('ё', 'е')
+    address = re.sub(r'[^\w-]+', ' ', address)
+    address = re.sub(r'(\d)([^\W\d_]+)(\d)', r'\1 \2 \3', address)
+    words = [ABBREVIATIONS.get(word, word) for word in address.split() if word.strip('-')]
+    return ' '.join(
+        word for word, next_word in zip(words, [*words[1:], ''])
+        if word not in OMITTED_WORDS and not (word == HOUSE_WORD and next_word[:1].isdigit())
+    )
+
+
+def renormalize_place_addresses(apps, schema_editor):
+    """Keep initials like "Д." in keys, they were dropped as a house marker before.
+
+    New keys only split old ones, so they can't collide.
+    """
+    Place = apps.get_model('place', 'Place')
+    changed_places = []
+    for place in Place.objects.all():
+        key = normalize_address(place.address)
+        if key != place.normalized_address:
+            place.normalized_address = key
+            changed_places.append(place)
+    Place.objects.bulk_update(changed_places, ['normalized_address'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('place', '0007_geocodingtask_attempts'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize_place_addresses, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,23 @@
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+from place.addresses import normalize_address
+from place.distances import Coordinates
 
 
 class Place(models.Model):
-    address = models.CharField(max_length=200, verbose_name='Адрес', unique=True)
+    RESOLVED = 1
+    NOT_FOUND = 2
+    TRANSIENT_ERROR = 3
+    STATUS_CHOICES = (
+        (RESOLVED, 'Координаты найдены'),
+        (NOT_FOUND, 'Адрес не найден'),
+        (TRANSIENT_ERROR, 'Временная ошибка геокодера'),
+    )
+    address = models.CharField(max_length=200, verbose_name='Адрес')
+    normalized_address = models.CharField(max_length=200, verbose_name='Нормализованный адрес', unique=True)
     latitude = models.FloatField(
         validators=[
             MinValueValidator(-90.0),
@@ -21,3 +35,51 @@ class Place(models.Model):
         verbose_name='Долгота'
     )
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления', db_index=True)
+    status = models.IntegerField(choices=STATUS_CHOICES, default=RESOLVED, verbose_name='Результат геокодирования')
+    failed_attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Неудачных попыток подряд')
+
+    class Meta:
+        verbose_name = 'Место'
+        verbose_name_plural = 'Места'
+
+    def __str__(self):
+        return self.address
+
+    def save(self, *args, **kwargs):
+        self.normalized_address = normalize_address(self.address)
+        super().save(*args, **kwargs)
+
+    @property
+    def has_coordinates(self):
+        return self.latitude is not None and self.longitude is not None
+
+    @property
+    def coordinates(self):
+        if not self.has_coordinates:
+            return None
+        return Coordinates(lat=self.latitude, lon=self.longitude)
+
+    def get_time_to_live(self):
+        if self.status == self.RESOLVED:
+            return settings.GEOCODER_RESOLVED_TTL
+        if self.status == self.NOT_FOUND:
+            return settings.GEOCODER_NOT_FOUND_TTL
+        backoff = settings.GEOCODER_RETRY_BACKOFF * 2 ** max(self.failed_attempts - 1, 0)
+        return min(backoff, settings.GEOCODER_RETRY_BACKOFF_MAX)
+
+    def is_stale(self, now=None):
+        now = now or timezone.now()
+        return now >= self.updated_at + self.get_time_to_live()
+
+
+class GeocodingTask(models.Model):
+    address = models.CharField(max_length=200, verbose_name='Адрес', unique=True)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь', db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Неудачных попыток')
+
+    class Meta:
+        verbose_name = 'Адрес в очереди на геокодирование'
+        verbose_name_plural = 'Адреса в очереди на геокодирование'
+
+    def __str__(self):
+        return self.address
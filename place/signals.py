@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from place.cache import bump_places_version
+from place.models import Place
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def invalidate_places_coordinates(sender, **kwargs):
+    bump_places_version()
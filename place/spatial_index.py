@@ -0,0 +1,84 @@
+import heapq
+import math
+from collections import namedtuple
+
+from place.distances import EARTH_RADIUS_KM
+
+
+TreeNode = namedtuple('TreeNode', ['point', 'key', 'axis', 'left', 'right'])
+
+
+class NearestPlacesIndex:
+    """K-d tree to find places nearest to given coordinates.
+
+    Coordinates are turned into 3D points on the unit sphere. Straight line
+    distance between such points grows with distance along the Earth surface,
+    so places nearest in 3D are nearest on the map too.
+    """
+
+    def __init__(self, places):
+        """`places` is an iterable of (key, Coordinates) pairs."""
+        points = [(to_unit_vector(coordinates), key) for key, coordinates in places]
+        self.size = len(points)
+        self.root = build_tree(points, depth=0)
+
+    def find_nearest(self, coordinates, count, keys=None):
+        """Return up to `count` (key, distance in km) pairs, closest first.
+
+        When `keys` is given, only places with these keys are considered.
+        Distance is haversine, as `fast` metric of `place.distances`.
+        """
+        target = to_unit_vector(coordinates)
+        nearest = []  # heap of (-squared chord, key), the farthest of found places on top
+
+        def search(node):
+            if node is None:
+                return
+            if keys is None or node.key in keys:
+                squared_chord = sum((a - b) ** 2 for a, b in zip(node.point, target))
+                if len(nearest) < count:
+                    heapq.heappush(nearest, (-squared_chord, node.key))
+                elif squared_chord < -nearest[0][0]:
+                    heapq.heapreplace(nearest, (-squared_chord, node.key))
+
+            offset = target[node.axis] - node.point[node.axis]
+            near_branch, far_branch = (node.left, node.right) if offset < 0 else (node.right, node.left)
+            search(near_branch)
+            if len(nearest) < count or offset ** 2 < -nearest[0][0]:
+                search(far_branch)
+
+        if count > 0:
+            search(self.root)
+        return [
+            (key, chord_to_km(math.sqrt(-negative_squared_chord)))
+            for negative_squared_chord, key in sorted(nearest, reverse=True)
+        ]
+
+
+def build_tree(points, depth):
+    if not points:
+        return None
+    axis = depth % 3
+    points.sort(key=lambda point: point[0][axis])
+    median = len(points) // 2
+    point, key = points[median]
+    return TreeNode(
+        point=point,
+        key=key,
+        axis=axis,
+        left=build_tree(points[:median], depth + 1),
+        right=build_tree(points[median + 1:], depth + 1),
+    )
+
+
+def to_unit_vector(coordinates):
+    lat, lon = math.radians(coordinates[0]), math.radians(coordinates[1])
+    return (
+        math.cos(lat) * math.cos(lon),
+        math.cos(lat) * math.sin(lon),
+        math.sin(lat),
+    )
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1))
@@ -1,3 +1,131 @@
-from django.test import TestCase
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .addresses import normalize_address
+from .cache import bump_places_version, places_coordinates_cache
+from .crud_helpers import get_places_coordinates
+from .models import Place
+from .yandex_geocoder_api import (
+    fetch_coordinates_batch,
+    MalformedGeocoderResponse,
+    PlaceDoesNotResolvedByGeocoder,
+)
+
+
+class StubGeocoderHandler(BaseHTTPRequestHandler):
+    """Answer like Yandex Geocoder, the reply depends on words in the address."""
+    protocol_version = 'HTTP/1.1'
+    delay = 0.2
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active_requests += 1
+            server.max_active_requests = max(server.max_active_requests, server.active_requests)
+        time.sleep(self.delay)
+        with server.lock:
+            server.active_requests -= 1
+
+        address = parse_qs(urlparse(self.path).query)['geocode'][0]
+        status = 200
+        if 'fail' in address:
+            status, body = 500, b''
+        elif 'broken' in address:
+            body = b'<html>oops'
+        elif 'nowhere' in address:
+            body = b'{"response": {"GeoObjectCollection": {"featureMember": []}}}'
+        else:
+            body = b'{"response": {"GeoObjectCollection": {"featureMember": [{"GeoObject": {"Point": {"pos": "37.61 55.75"}}}]}}}'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchCoordinatesBatchTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeocoderHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.geocoder_url = f'http://127.0.0.1:{cls.server.server_port}/'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.active_requests = 0
+        self.server.max_active_requests = 0
+
+    def test_addresses_are_geocoded_concurrently(self):
+        addresses = [f'Москва, Тверская {number}' for number in range(10)]
+        with override_settings(YANDEX_GEOCODER_URL=self.geocoder_url, YANDEX_GEOCODER_MAX_WORKERS=10):
+            started_at = time.monotonic()
+            results = fetch_coordinates_batch(addresses)
+            elapsed = time.monotonic() - started_at
+
+        self.assertEqual(results, {address: (37.61, 55.75) for address in addresses})
+        self.assertGreater(self.server.max_active_requests, 1)
+        self.assertLess(elapsed, StubGeocoderHandler.delay * len(addresses) / 2)
+
+    def test_failures_are_mapped_per_address(self):
+        addresses = ['Москва, Тверская 1', 'nowhere', 'fail', 'broken']
+        with override_settings(YANDEX_GEOCODER_URL=self.geocoder_url):
+            results = fetch_coordinates_batch(addresses)
+
+        self.assertEqual(results['Москва, Тверская 1'], (37.61, 55.75))
+        self.assertIsInstance(results['nowhere'], PlaceDoesNotResolvedByGeocoder)
+        self.assertIsInstance(results['fail'], requests.HTTPError)
+        self.assertIsInstance(results['broken'], MalformedGeocoderResponse)
+
+
+class NormalizeAddressTest(SimpleTestCase):
+    def test_equivalent_spellings_share_key(self):
+        self.assertEqual(normalize_address('Москва, Тверская ул., д. 1'), 'москва тверская 1')
+        self.assertEqual(normalize_address('г. москва,  тверская, дом 1'), 'москва тверская 1')
+        self.assertEqual(normalize_address('Москва, Тверская 12к2'), normalize_address('Москва, Тверская 12 корпус 2'))
+        self.assertEqual(normalize_address('Москва, Тверская - 1'), 'москва тверская 1')
+
+    def test_initial_is_kept(self):
+        self.assertEqual(normalize_address('Москва, ул. Д. Ульянова 1'), 'москва д ульянова 1')
+        self.assertEqual(normalize_address('Москва, ул. Д. Ульянова, д. 1'), 'москва д ульянова 1')
+        self.assertNotEqual(normalize_address('Москва, ул. Д. Ульянова 1'), normalize_address('Москва, Ульянова 1'))
+
+
+class PlacesCoordinatesTest(TestCase):
+    def setUp(self):
+        places_coordinates_cache.clear()
+
+    def test_only_not_found_places_are_mapped_to_none(self):
+        Place.objects.create(address='Москва, Тверская 1', latitude=55.75, longitude=37.61)
+        Place.objects.create(address='Москва, Нигде 1', status=Place.NOT_FOUND)
+        Place.objects.create(address='Москва, Арбат 1', status=Place.TRANSIENT_ERROR, failed_attempts=1)
+
+        coordinates = get_places_coordinates(['Москва, Тверская 1', 'Москва, Нигде 1', 'Москва, Арбат 1'])
+
+        self.assertEqual(coordinates['Москва, Тверская 1'], (55.75, 37.61))
+        self.assertIsNone(coordinates['Москва, Нигде 1'])
+        self.assertNotIn('Москва, Арбат 1', coordinates)
+
+    def test_rewritten_places_drop_cached_coordinates(self):
+        place = Place.objects.create(address='Москва, Тверская 1', latitude=55.75, longitude=37.61)
+        get_places_coordinates(['Москва, Тверская 1'])
+
+        Place.objects.filter(pk=place.pk).update(latitude=55.76)
+        self.assertEqual(get_places_coordinates(['Москва, Тверская 1'])['Москва, Тверская 1'].lat, 55.75)
+
+        bump_places_version()
+        self.assertEqual(get_places_coordinates(['Москва, Тверская 1'])['Москва, Тверская 1'].lat, 55.76)
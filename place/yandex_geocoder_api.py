@@ -1,4 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from django.conf import settings
 
@@ -7,20 +10,54 @@ class PlaceDoesNotResolvedByGeocoder(Exception):
     pass
 
 
-def fetch_coordinates_from_yandex_api(address):
+class MalformedGeocoderResponse(Exception):
+    pass
+
+
+def fetch_coordinates_from_yandex_api(address, session=requests):
     apikey = settings.YANDEX_API_KEY
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(base_url, params={
+    base_url = settings.YANDEX_GEOCODER_URL
+    response = session.get(base_url, params={
         "geocode": address,
         "apikey": apikey,
         "format": "json",
-    })
+    }, timeout=settings.YANDEX_GEOCODER_TIMEOUT)
     response.raise_for_status()
-    found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+    try:
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+        if not found_places:
+            raise PlaceDoesNotResolvedByGeocoder
+        most_relevant = found_places[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
+        return float(lon), float(lat)
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as error:
+        raise MalformedGeocoderResponse(f'Unexpected geocoder response for {address!r}: {error!r}') from error
+
+
+def fetch_coordinates_batch(addresses):
+    """Geocode addresses concurrently through one keep-alive session.
+
+    Returns dict address -> (lon, lat). When geocoder fails to resolve
+    an address, it is mapped to the raised PlaceDoesNotResolvedByGeocoder,
+    MalformedGeocoderResponse or requests.RequestException instead.
+    """
+    if not addresses:
+        return {}
 
-    if not found_places:
-        raise PlaceDoesNotResolvedByGeocoder
+    workers_count = min(settings.YANDEX_GEOCODER_MAX_WORKERS, len(addresses))
+    adapter = HTTPAdapter(pool_maxsize=workers_count)
+    with requests.Session() as session, ThreadPoolExecutor(workers_count) as executor:
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        futures = {
+            address: executor.submit(fetch_coordinates_from_yandex_api, address, session)
+            for address in addresses
+        }
 
-    most_relevant = found_places[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
-    return lon, lat
+        results = {}
+        for address, future in futures.items():
+            try:
+                results[address] = future.result()
+            except (requests.RequestException, PlaceDoesNotResolvedByGeocoder, MalformedGeocoderResponse) as error:
+                results[address] = error
+    return results
@@ -0,0 +1,41 @@
+import base64
+import binascii
+
+import django_filters
+from django import forms
+from django.utils.dateparse import parse_datetime
+
+from foodcartapp.models import Order, Restaurant
+
+
+class OrderFilter(django_filters.FilterSet):
+    status = django_filters.ChoiceFilter(choices=Order.STATUS_CHOICES, empty_label='Все')
+    payment_method = django_filters.ChoiceFilter(choices=Order.PAYMENT_METHOD_CHOICES, empty_label='Любой')
+    restaurant = django_filters.ModelChoiceFilter(queryset=Restaurant.objects.order_by('name'), empty_label='Любой')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'payment_method', 'restaurant']
+
+
+class OrdersPageForm(forms.Form):
+    cursor = forms.CharField(required=False)
+
+    def clean_cursor(self):
+        """Return (registered_at, id) of the last order of previous page."""
+        cursor = self.cleaned_data['cursor']
+        if not cursor:
+            return None
+        try:
+            registered_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            registered_at = parse_datetime(registered_at)
+            order_id = int(order_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise forms.ValidationError('Некорректный курсор')
+        if not registered_at:
+            raise forms.ValidationError('Некорректный курсор')
+        return registered_at, order_id
+
+
+def encode_order_cursor(order):
+    return base64.urlsafe_b64encode(f'{order.registered_at.isoformat()}|{order.id}'.encode()).decode()
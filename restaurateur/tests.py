@@ -1,3 +1,46 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+
+from foodcartapp.models import Order, OrderChange
+
+from .views import generate_order_events, get_orders_filter_data
+
+
+@override_settings(
+    ORDER_EVENTS_STREAM_DURATION=0.3,
+    ORDER_EVENTS_POLL_INTERVAL=0.1,
+    ORDER_EVENTS_GRACE_PERIOD=timedelta(seconds=10),
+)
+class OrderEventsTest(TestCase):
+    def create_order(self, firstname):
+        return Order.objects.create(
+            firstname=firstname,
+            lastname='Петров',
+            phonenumber='+79161234567',
+            address='Москва, Тверская 1',
+        )
+
+    def stream_events(self, last_event_id):
+        filter_data = get_orders_filter_data(QueryDict())
+        return ''.join(generate_order_events(last_event_id, filter_data, '/manager/orders/'))
+
+    def test_change_committed_after_greater_ids_is_streamed_once(self):
+        late_order = self.create_order('Иван')
+        next_order = self.create_order('Пётр')
+        # the stream already went past the change of next_order before the one of late_order got committed
+        last_event_id = OrderChange.objects.get(order_id=next_order.id).id
+
+        events = self.stream_events(last_event_id)
+
+        self.assertEqual(events.count(f'"id": {late_order.id},'), 1)
+        self.assertEqual(events.count(f'"id": {next_order.id},'), 1)
+        self.assertNotIn(f'id: {last_event_id - 1}\n', events)
+
+    def test_old_changes_are_not_streamed_again(self):
+        order = self.create_order('Иван')
+        change = OrderChange.objects.get(order_id=order.id)
+        OrderChange.objects.filter(pk=change.pk).update(changed_at=change.changed_at - timedelta(minutes=1))
+
+        self.assertNotIn('event: order', self.stream_events(change.id))
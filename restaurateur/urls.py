@@ -14,6 +14,9 @@ urlpatterns = [
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/events/', views.stream_order_events, name="order_events"),
+
+    path('places-cache/', views.view_places_cache_stats, name="places_cache_stats"),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
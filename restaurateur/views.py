@@ -1,16 +1,28 @@
+import json
+import time
+from functools import lru_cache
+
 from django import forms
-from django.db.models import Sum
+from django.conf import settings
+from django.db.models import Max, Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.views import View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.contrib.auth.decorators import user_passes_test
 
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
-from geopy.distance import distance
 
-from foodcartapp.models import Product, Restaurant, Order
-from place.crud_helpers import get_places
+from foodcartapp.models import Product, Restaurant, Order, OrderChange
+from place.cache import places_coordinates_cache
+from place.crud_helpers import get_places_coordinates
+from place.distances import calculate_distances_matrix
+from place.spatial_index import NearestPlacesIndex
+
+from .filters import encode_order_cursor, OrderFilter, OrdersPageForm
 
 
 class Login(forms.Form):
@@ -97,36 +109,193 @@ def view_restaurants(request):
     })
 
 
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_places_cache_stats(request):
+    """Show counters of the in-process coordinates cache of the worker which serves the request."""
+    return JsonResponse(places_coordinates_cache.get_stats())
+
+
 def enrich_orders_with_delivery_distance(orders):
-    order_addresses = [o.address for o in orders]
-    restaurants = Restaurant.objects.all()
-    restaurants_addresses = [r.address for r in restaurants]
-    places = get_places(order_addresses + restaurants_addresses)
+    restaurants = list(Restaurant.objects.all())
+    coordinates = get_places_coordinates(
+        [o.address for o in orders] + [r.address for r in restaurants]
+    )
+
+    if settings.NEAREST_RESTAURANTS_LIMIT:
+        restaurants_index = get_restaurants_index(restaurants, coordinates)
+        for order in orders:
+            keep_nearest_restaurants(order, restaurants_index, coordinates, settings.NEAREST_RESTAURANTS_LIMIT)
+
+    located_order_addresses = [a for a in dict.fromkeys(o.address for o in orders) if coordinates.get(a)]
+    located_restaurants_addresses = [
+        a for a in dict.fromkeys(r.address for order in orders for r in order.restaurants)
+        if coordinates.get(a)
+    ]
+    distances = calculate_distances_matrix(
+        [coordinates[a] for a in located_order_addresses],
+        [coordinates[a] for a in located_restaurants_addresses],
+    )
+    rows = {address: row for row, address in enumerate(located_order_addresses)}
+    columns = {address: column for column, address in enumerate(located_restaurants_addresses)}
+
     for order in orders:
-        order_place = places.get(order.address)
+        row = rows.get(order.address)
 
         for restaurant in order.restaurants:
-            restaurant_place = places.get(restaurant.address)
-            restaurant.distance = calculate_distance(order_place, restaurant_place)
+            column = columns.get(restaurant.address)
+            # missing address is not geocoded yet, None means geocoder could not find it
+            restaurant.address_not_found = any(
+                address in coordinates and coordinates[address] is None
+                for address in [order.address, restaurant.address]
+            )
+            if row is None or column is None:
+                restaurant.distance = None
+            else:
+                restaurant.distance = round(float(distances[row, column]), 3)
+
+        order.restaurants.sort(key=lambda r: (r.distance is None, r.distance))
+
+
+def keep_nearest_restaurants(order, restaurants_index, coordinates, count):
+    """Leave only `count` nearest restaurants of the order and ones with unknown coordinates."""
+    order_coordinates = coordinates.get(order.address)
+    if not order_coordinates:
+        return
+
+    located_restaurants = {r.id: r for r in order.restaurants if coordinates.get(r.address)}
+    nearest = restaurants_index.find_nearest(order_coordinates, count, keys=located_restaurants.keys())
+    order.restaurants = [located_restaurants[restaurant_id] for restaurant_id, _ in nearest] + [
+        r for r in order.restaurants if not coordinates.get(r.address)
+    ]
 
-        order.restaurants.sort(key=lambda r: r.distance)
 
+def get_restaurants_index(restaurants, coordinates):
+    """Return spatial index of restaurants, rebuilt only when restaurants or their coordinates change."""
+    located_restaurants = tuple(sorted(
+        (r.id, coordinates[r.address]) for r in restaurants if coordinates.get(r.address)
+    ))
+    return build_restaurants_index(located_restaurants)
 
-def calculate_distance(one_place, another_place):
-    return round(distance(
-        (one_place.longitude, one_place.latitude),
-        (another_place.longitude, another_place.latitude)
-    ).km, 3)
+
+@lru_cache(maxsize=1)
+def build_restaurants_index(located_restaurants):
+    return NearestPlacesIndex(located_restaurants)
 
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
-    orders = Order.objects.filter(status=Order.NEW)\
-        .annotate(total_count=Sum('items__total_price'))\
-        .fetch_available_restaurants()
+    filter_data = get_orders_filter_data(request.GET)
+    orders_filter = OrderFilter(filter_data, queryset=Order.objects.order_by('registered_at', 'id'))
+    page_form = OrdersPageForm(request.GET)
+
+    orders = orders_filter.qs
+    cursor = page_form.cleaned_data['cursor'] if page_form.is_valid() else None
+    if cursor:
+        registered_at, order_id = cursor
+        orders = orders.filter(
+            Q(registered_at__gt=registered_at) | Q(registered_at=registered_at, id__gt=order_id)
+        )
+    page_size = settings.MANAGER_ORDERS_PAGE_SIZE
+    orders = orders[:page_size + 1].fetch_available_restaurants()
+    has_next_page = len(orders) > page_size
+    orders = orders[:page_size]
 
     enrich_orders_with_delivery_distance(orders)
 
+    next_page_url = None
+    if has_next_page:
+        next_page_params = filter_data.copy()
+        next_page_params['cursor'] = encode_order_cursor(orders[-1])
+        next_page_url = f'{request.path}?{next_page_params.urlencode()}'
+    events_params = filter_data.copy()
+    events_params['last_event_id'] = OrderChange.objects.aggregate(last_id=Max('id'))['last_id'] or 0
     return render(request, template_name='order_items.html', context={
         'order_items': orders,
+        'orders_filter': orders_filter,
+        'next_page_url': next_page_url,
+        'board_url': request.get_full_path(),
+        'events_url': f'{reverse("restaurateur:order_events")}?{events_params.urlencode()}',
     })
+
+
+def get_orders_filter_data(query_params):
+    filter_data = query_params.copy()
+    filter_data.setdefault('status', str(Order.NEW))
+    return filter_data
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def stream_order_events(request):
+    """Stream changed orders of the board as Server-Sent Events.
+
+    The stream is closed after ORDER_EVENTS_STREAM_DURATION seconds to free
+    the worker, the browser reconnects and resumes from Last-Event-ID.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id)
+    except (TypeError, ValueError):
+        last_event_id = OrderChange.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+    filter_data = get_orders_filter_data(request.GET)
+    board_params = filter_data.copy()
+    board_params.pop('last_event_id', None)
+    board_url = f'{reverse("restaurateur:view_orders")}?{board_params.urlencode()}'
+
+    response = StreamingHttpResponse(
+        generate_order_events(last_event_id, filter_data, board_url),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
+def generate_order_events(last_event_id, filter_data, board_url):
+    """Poll the order change log and render a row for every changed order.
+
+    Several changes of one order are squashed into one event. Orders which
+    are deleted or don't match the board filter any more get empty html.
+
+    Ids are given out on insert, not on commit, so a change may show up
+    after changes with greater ids were streamed. Each poll therefore also
+    looks at changes of the last ORDER_EVENTS_GRACE_PERIOD seconds and skips
+    the ones already sent.
+    """
+    yield f'retry: {int(settings.ORDER_EVENTS_POLL_INTERVAL * 1000)}\n\n'
+    deadline = time.monotonic() + settings.ORDER_EVENTS_STREAM_DURATION
+    sent_changes = {}  # change id -> changed_at, for changes within the grace period
+    while time.monotonic() < deadline:
+        recent_border = timezone.now() - settings.ORDER_EVENTS_GRACE_PERIOD
+        sent_changes = {
+            change_id: changed_at
+            for change_id, changed_at in sent_changes.items()
+            if changed_at >= recent_border
+        }
+        changes = list(
+            OrderChange.objects
+            .filter(Q(id__gt=last_event_id) | Q(changed_at__gte=recent_border))
+            .exclude(id__in=sent_changes.keys())
+            .order_by('id')
+            .values_list('id', 'order_id', 'changed_at')[:settings.ORDER_EVENTS_BATCH_SIZE]
+        )
+        if not changes:
+            yield ': ping\n\n'
+            time.sleep(settings.ORDER_EVENTS_POLL_INTERVAL)
+            continue
+
+        last_change_ids = {order_id: change_id for change_id, order_id, __ in changes}
+        changed_orders = Order.objects.filter(pk__in=last_change_ids)
+        orders = OrderFilter(filter_data, queryset=changed_orders).qs.fetch_available_restaurants()
+        enrich_orders_with_delivery_distance(orders)
+        rows = {
+            order.id: render_to_string('order_row.html', {'item': order, 'board_url': board_url})
+            for order in orders
+        }
+
+        # event id stays the greatest change id seen, a reconnect resumes after it
+        last_event_id = max(last_event_id, changes[-1][0])
+        for order_id, change_id in sorted(last_change_ids.items(), key=lambda item: item[1]):
+            data = json.dumps({'id': order_id, 'html': rows.get(order_id)})
+            yield f'id: {last_event_id}\nevent: order\ndata: {data}\n\n'
+        sent_changes.update((change_id, changed_at) for change_id, __, changed_at in changes)
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 import dj_database_url
 
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
     'debug_toolbar',
     'phonenumber_field',
     'rest_framework',
+    'django_filters',
     'place'
 ]
 
@@ -89,6 +91,13 @@ DATABASES = {
     )
 }
 
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', 'locmem://'),
+}
+# django-cache-url maps redis:// to the backend which appeared in Django 4.0, Django 3.2 talks to Redis through django-redis
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.redis.RedisCache':
+    CACHES['default']['BACKEND'] = 'django_redis.cache.RedisCache'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -127,3 +136,28 @@ STATICFILES_DIRS = [
 ]
 
 YANDEX_API_KEY = env('YANDEX_API_KEY', None)
+YANDEX_GEOCODER_URL = env('YANDEX_GEOCODER_URL', 'https://geocode-maps.yandex.ru/1.x')
+YANDEX_GEOCODER_MAX_WORKERS = env.int('YANDEX_GEOCODER_MAX_WORKERS', 10)
+YANDEX_GEOCODER_TIMEOUT = env.float('YANDEX_GEOCODER_TIMEOUT', 10)
+
+GEOCODER_RESOLVED_TTL = timedelta(days=env.int('GEOCODER_RESOLVED_TTL_DAYS', 30))
+GEOCODER_NOT_FOUND_TTL = timedelta(days=env.int('GEOCODER_NOT_FOUND_TTL_DAYS', 7))
+GEOCODER_RETRY_BACKOFF = timedelta(seconds=env.int('GEOCODER_RETRY_BACKOFF_SECONDS', 60))
+GEOCODER_RETRY_BACKOFF_MAX = timedelta(seconds=env.int('GEOCODER_RETRY_BACKOFF_MAX_SECONDS', 24 * 60 * 60))
+PLACES_CACHE_SIZE = env.int('PLACES_CACHE_SIZE', 10000)
+
+DISTANCE_METRIC = env.str('DISTANCE_METRIC', 'fast')
+NEAREST_RESTAURANTS_LIMIT = env.int('NEAREST_RESTAURANTS_LIMIT', 5)
+MANAGER_ORDERS_PAGE_SIZE = env.int('MANAGER_ORDERS_PAGE_SIZE', 50)
+ORDER_EVENTS_POLL_INTERVAL = env.float('ORDER_EVENTS_POLL_INTERVAL', 2)
+ORDER_EVENTS_STREAM_DURATION = env.int('ORDER_EVENTS_STREAM_DURATION', 60)
+ORDER_EVENTS_BATCH_SIZE = env.int('ORDER_EVENTS_BATCH_SIZE', 100)
+ORDER_EVENTS_GRACE_PERIOD = timedelta(seconds=env.int('ORDER_EVENTS_GRACE_PERIOD_SECONDS', 10))
+
+CATALOGUE_CACHE_TIMEOUT = env.int('CATALOGUE_CACHE_TIMEOUT', 24 * 60 * 60)
+CATALOGUE_MAX_AGE = env.int('CATALOGUE_MAX_AGE', 0)
+
+BULK_ORDERS_MAX_COUNT = env.int('BULK_ORDERS_MAX_COUNT', 1000)
+BULK_ORDERS_CHUNK_SIZE = env.int('BULK_ORDERS_CHUNK_SIZE', 100)
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=env.int('IDEMPOTENCY_KEY_TTL_HOURS', 24))